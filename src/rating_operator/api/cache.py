@@ -0,0 +1,235 @@
+import threading
+import time
+from concurrent.futures import Future
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+_MISSING = object()
+_CACHES = []
+
+# Changes whenever the caches are cleared, the boot time keeps it unique across restarts
+_REVISION = [time.time_ns(), 0]
+_REVISION_LOCK = threading.Lock()
+# When the caches were last cleared, on the monotonic clock
+_CLEARED_AT = [float('-inf')]
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache, whose entries expire after a given time.
+
+    :ttl (float) The lifetime of an entry, in seconds
+    :maxsize (int) The maximum number of entries held by the cache
+    """
+
+    def __init__(self, ttl: float = 30, maxsize: int = 1024):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value from the cache.
+
+        :key (Hashable) The key of the entry
+        :default (Any) The value to return if the entry is missing or expired
+
+        Return the cached value or the default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return default
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Store a value in the cache, evicting the oldest entries if full.
+
+        :key (Hashable) The key of the entry
+        :value (Any) The value to store
+        """
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.maxsize:
+                self._evict()
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Remove an entry from the cache.
+
+        :key (Hashable) The key of the entry
+        :default (Any) The value to return if the entry is missing
+
+        Return the removed value or the default
+        """
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            self._entries.clear()
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [key for key, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) >= self.maxsize:
+            # Entries are kept in insertion order, the first one is the oldest
+            del self._entries[next(iter(self._entries))]
+
+
+def make_key(kwargs: Dict) -> Hashable:
+    """
+    Build a hashable cache key from keyword arguments.
+
+    :kwargs (Dict) A dictionary containing the function parameters
+
+    Return a tuple usable as a cache key
+    """
+    return tuple(
+        (key, tuple(value) if isinstance(value, list) else value)
+        for key, value in sorted(kwargs.items())
+    )
+
+
+class SingleFlight:
+    """
+    Share the result of a call between the concurrent identical calls.
+
+    The first caller of a key runs the function, the callers arriving before it
+    returns wait for its result instead of running it again.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def call(self, key: Hashable, func: Callable, **kwargs: Dict) -> Any:
+        """
+        Call the function, or wait for the identical call already running.
+
+        :key (Hashable) The key identifying the call
+        :func (Callable) The function to call
+        :kwargs (Dict) A dictionary containing all the function parameters
+
+        Return the result of the function, or raise its error
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            result = func(**kwargs)
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def single_flight(func: Callable) -> Callable:
+    """
+    Coalesce the concurrent calls of the decorated function with the same arguments.
+
+    Meant to be used as a decorator, on functions called with keyword arguments only
+
+    :func (Callable) The decorated function
+
+    Return a wrapper sharing the result of identical concurrent calls
+    """
+    flight = SingleFlight()
+
+    @wraps(func)
+    def wrapper(**kwargs: Dict) -> Any:
+        """
+        Return the result of the running identical call, or call the decorated function.
+
+        :kwargs (Dict) A dictionary containing all the function parameters
+
+        Return the result of the decorated function
+        """
+        return flight.call(make_key(kwargs), func, **kwargs)
+    return wrapper
+
+
+def cached(ttl: float = 30, maxsize: int = 1024) -> Callable:
+    """
+    Cache the results of the decorated function, keyed by its keyword arguments.
+
+    Meant to be used as a decorator, on functions called with keyword arguments only
+
+    :ttl (float) The lifetime of a cached result, in seconds
+    :maxsize (int) The maximum number of results held for the function
+
+    Return the decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        cache = TTLCache(ttl=ttl, maxsize=maxsize)
+        _CACHES.append(cache)
+        flight = SingleFlight()
+
+        @wraps(func)
+        def wrapper(**kwargs: Dict) -> Any:
+            """
+            Return the cached result, or call the decorated function and cache it.
+
+            :kwargs (Dict) A dictionary containing all the function parameters
+
+            Return the result of the decorated function
+            """
+            key = make_key(kwargs)
+            result = cache.get(key, _MISSING)
+            if result is _MISSING:
+                # Concurrent misses of a key compute it once
+                result = flight.call(key, func, **kwargs)
+                cache.set(key, result)
+            return result
+        wrapper.cache = cache
+        return wrapper
+    return decorator
+
+
+def clear_caches():
+    """Invalidate the results of every function decorated with cached."""
+    with _REVISION_LOCK:
+        _REVISION[1] += 1
+        _CLEARED_AT[0] = time.monotonic()
+    for cache in _CACHES:
+        cache.clear()
+
+
+def data_revision() -> Tuple[int, int]:
+    """
+    Get the revision of the data, updated each time the caches are cleared.
+
+    Return a tuple identifying the current revision
+    """
+    return tuple(_REVISION)
+
+
+def since_cleared() -> float:
+    """
+    Get the time elapsed since the caches were last cleared.
+
+    Return the elapsed time in seconds, infinite if they never were
+    """
+    return time.monotonic() - _CLEARED_AT[0]
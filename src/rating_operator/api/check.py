@@ -1,8 +1,12 @@
+import calendar
 import datetime
 import re
 from functools import wraps
-from typing import AnyStr, Callable, Dict
+from typing import AnyStr, Callable, Dict, Tuple
 
+from flask import abort, g, jsonify, make_response, request
+
+from rating_operator.api.cache import cached
 from rating_operator.api.db import db
 from rating_operator.api.endpoints import auth as auth
 
@@ -75,6 +79,58 @@ def date_checker_start_end(func: Callable) -> Callable:
     return wrapper
 
 
+_FRAMES_SPAN_QRY = sa.text("""
+    SELECT min(frame_begin) AS first_begin, max(frame_begin) AS last_begin
+    FROM frames
+""")
+
+
+@cached(ttl=60)
+def frames_span() -> Tuple[datetime.datetime, datetime.datetime]:
+    """
+    Get the time span covered by the rated frames.
+
+    Return the first and last frame_begin, both None if there are no frames
+    """
+    row = db.engine.execute(_FRAMES_SPAN_QRY).first()
+    return row.first_begin, row.last_begin
+
+
+def skip_empty_range(empty: Callable = list) -> Callable:
+    """
+    Return an empty result without querying when no frame begins in the time range.
+
+    Meant to be used as a decorator, on functions taking the start and end parameters
+
+    :empty (Callable, optional) A function building the empty result, a list by default
+
+    Return the decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(**kwargs: Dict):
+            """
+            Compare the time range with the frames, before calling the decorated function.
+
+            :kwargs (Dict) A dictionary containing all the function parameters
+
+            Return the empty result, or the result of the decorated function
+            """
+            try:
+                start, end = (
+                    datetime.datetime.strptime(kwargs[key], '%Y-%m-%d %H:%M:%S.%fZ')
+                    for key in ('start', 'end'))
+            except ValueError:
+                return func(**kwargs)
+            first_begin, last_begin = frames_span()
+            if start > end or first_begin is None \
+                    or end < first_begin or start > last_begin:
+                return empty()
+            return func(**kwargs)
+        return wrapper
+    return decorator
+
+
 def round_time(dt: datetime.datetime = None, round_to: int = 60) -> datetime.datetime:
     """
     Round the datetime object to the closest minute.
@@ -95,6 +151,39 @@ def round_time(dt: datetime.datetime = None, round_to: int = 60) -> datetime.dat
         -dt.microsecond) - datetime.timedelta(minutes=5))
 
 
+def period_start(unit: AnyStr, now: datetime.datetime = None) -> datetime.datetime:
+    """
+    Truncate a time to the start of its day, week or month, as date_trunc does.
+
+    :unit (AnyStr) A string representing the period, either day, week or month.
+    :now (datetime, optional) The time to truncate, in UTC like the frames, now if unset.
+
+    Return the start of the period.
+    """
+    if now is None:
+        now = datetime.datetime.utcnow()
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == 'week':
+        return start - datetime.timedelta(days=start.weekday())
+    if unit == 'month':
+        return start.replace(day=1)
+    return start
+
+
+def period_hours(unit: AnyStr, now: datetime.datetime) -> int:
+    """
+    Get the number of hours in the day, week or month containing a time.
+
+    :unit (AnyStr) A string representing the period, either day, week or month.
+    :now (datetime) A time within the period.
+
+    Return the number of hours of the period.
+    """
+    if unit == 'month':
+        return 24 * calendar.monthrange(now.year, now.month)[1]
+    return {'day': 24, 'week': 24 * 7}[unit]
+
+
 def validate_request_params(kwargs: Dict, regex: AnyStr = r'[a-zA-Z0-9_,]') -> Dict:
     """
     Take a valid regex and apply it on every key:value couple in kwargs.
@@ -112,27 +201,84 @@ def validate_request_params(kwargs: Dict, regex: AnyStr = r'[a-zA-Z0-9_,]') -> D
     return kwargs
 
 
+MAX_PAGE_SIZE = 1000
+
+
+def pagination_params(args: Dict) -> Dict:
+    """
+    Extract the pagination parameters from the arguments of a request.
+
+    Without limit, every row is returned. A limit is at least 1, capped to MAX_PAGE_SIZE.
+
+    :args (Dict) A dictionary containing the request arguments, consumed in place
+
+    Return a dictionary holding the limit and offset of the page
+    """
+    limit, offset = args.pop('limit', None), args.pop('offset', '0')
+    if limit is not None and (not limit.isdigit() or int(limit) < 1):
+        raise InvalidRequestParameterError(f'Parameter limit: {limit} is invalid.')
+    if not offset.isdigit():
+        raise InvalidRequestParameterError(f'Parameter offset: {offset} is invalid.')
+    return {
+        'limit': None if limit is None else min(int(limit), MAX_PAGE_SIZE),
+        'offset': int(offset)
+    }
+
+
 def request_params(args: ImmutableDict) -> Dict:
     """
-    Validate the argument of an incoming request.
+    Validate the argument of an incoming request, aborting with a 400 if one is invalid.
 
     :args (ImmutableDict) A uneditable dictionary, containing the values to validate
 
     Return a validated dictionary
     """
-    now = round_time()
-    last_hour = now - datetime.timedelta(hours=2, minutes=1)
     args = args.to_dict()
-    validated = {
-        'start': args.pop('start', last_hour.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'),
-        'end': args.pop('end', now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z')
-    }
-    validated.update(
-        validate_request_params(args)
-    )
+    start, end = args.pop('start', None), args.pop('end', None)
+    # Clients such as Grafana always send the range, the default is built only if needed
+    if start is None or end is None:
+        now = round_time()
+        if start is None:
+            last_hour = now - datetime.timedelta(hours=2, minutes=1)
+            start = last_hour.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'
+        if end is None:
+            end = now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3] + 'Z'
+    try:
+        validated = {
+            'start': start,
+            'end': end,
+            **pagination_params(args)
+        }
+        validated.update(
+            validate_request_params(args)
+        )
+    except InvalidRequestParameterError as exc:
+        abort(make_response(jsonify(message=str(exc)), 400))
     return validated
 
 
+def cached_request_params() -> Dict:
+    """
+    Validate the arguments of the current request, only once per request.
+
+    Return a validated dictionary, shared by every caller within the request
+    """
+    if 'request_params' not in g:
+        g.request_params = request_params(request.args)
+    return g.request_params
+
+
+def request_body() -> Dict:
+    """
+    Get the parameters sent in the body of the current request, as form or JSON.
+
+    Return the form, the decoded JSON document, or an empty dictionary
+    """
+    if 'request_body' not in g:
+        g.request_body = request.form or request.get_json(silent=True) or {}
+    return g.request_body
+
+
 def assert_url_params(func: Callable) -> Callable:
     """
     Assert that url parameter are valid.
@@ -158,6 +304,24 @@ def assert_url_params(func: Callable) -> Callable:
     return wrapper
 
 
+@cached(ttl=60)
+def tenant_namespaces(tenant_id: AnyStr) -> Tuple[AnyStr, ...]:
+    """
+    Get the namespaces accessible by a tenant, every namespace for administrators.
+
+    :tenant_id (AnyStr) A string representing the tenant
+
+    Return a tuple of namespaces
+    """
+    qry = 'SELECT namespace FROM namespaces'
+    admin_user = False
+    if tenant_id != 'default':
+        admin_user = auth.check_admin(tenant_id)
+    if admin_user is False:
+        qry = sa.text(qry + ' WHERE tenant_id = :tenant_id').params(tenant_id=tenant_id)
+    return tuple(dict(row)['namespace'] for row in db.engine.execute(qry))
+
+
 def multi_tenant(func: Callable) -> Callable:
     """
     Constraint query execution according to the user.
@@ -175,18 +339,10 @@ def multi_tenant(func: Callable) -> Callable:
 
         Return the wrapped function
         """
-        qry = 'SELECT namespace FROM namespaces'
-        tenant = kwargs['tenant_id']
-        admin_user = False
-        if tenant != 'default':
-            admin_user = auth.check_admin(tenant)
-        if admin_user is False:
-            qry = sa.text(qry + ' WHERE tenant_id = :tenant_id').params(
-                tenant_id=kwargs['tenant_id'])
-        kwargs['namespaces'] = [
-            dict(row)['namespace'] for row in db.engine.execute(qry)
-        ]
-        if 'unspecified' not in kwargs['namespaces'] and len(kwargs['namespaces']) > 0:
-            kwargs['namespaces'].append('unspecified')
+        namespaces = set(tenant_namespaces(tenant_id=kwargs['tenant_id']))
+        if namespaces:
+            namespaces.add('unspecified')
+        # A sorted list, bound as an array, keeps the statement parameters stable
+        kwargs['namespaces'] = sorted(namespaces)
         return func(**kwargs)
     return wrapper
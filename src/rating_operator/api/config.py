@@ -6,7 +6,7 @@ import shutil
 import sys
 import time
 from datetime import datetime as dt
-from typing import AnyStr, Dict, Generator, List
+from typing import AnyStr, Dict, Generator, List, Tuple
 
 import yaml
 
@@ -55,6 +55,21 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = envvar('POSTGRES_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Sized for the threaded server, a connection per concurrent request
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('POSTGRES_POOL_SIZE', 20)),
+        'max_overflow': int(os.environ.get('POSTGRES_MAX_OVERFLOW', 40)),
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        # Statements executed with a list of parameters are sent in pages, not row by row
+        'executemany_mode': 'values_plus_batch',
+        'executemany_values_page_size': 1000
+    }
+    # Read-only queries go to a hot standby when one is given
+    if os.environ.get('POSTGRES_REPLICA_URI'):
+        SQLALCHEMY_BINDS = {'replica': os.environ['POSTGRES_REPLICA_URI']}
+        # In seconds, the reads go back to the primary past this replication lag
+        POSTGRES_REPLICA_MAX_LAG = float(os.environ.get('POSTGRES_REPLICA_MAX_LAG', 10))
     JSON_ADD_STATUS = False
     JSON_DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%S'
     if envvar_string('AUTH') == 'true':
@@ -324,6 +339,22 @@ def generate_rules_export() -> Generator[AnyStr, None, None]:
     return generate_metrics_from_rules(closest_config['rules'])
 
 
+def rules_export_revision() -> Tuple[int, int]:
+    """
+    Identify the revision of the rules currently exported to Prometheus.
+
+    Only the configuration directory is listed and the rules file stat'ed, so it is
+    much cheaper than loading the configuration itself.
+
+    Return a tuple of the closest configuration name and its rules modification time
+    """
+    timestamps = tuple(int(ts) for ts in retrieve_directories())
+    closest = timestamps[get_closest_configs_bisect(int(time.time()), timestamps)]
+    rating_rates_dir = envvar('RATING_RATES_DIR')
+    mtime = os.stat(f'{rating_rates_dir}/{closest}/rules.yaml').st_mtime_ns
+    return closest, mtime
+
+
 def retrieve_closest_config(timestamp: AnyStr) -> Dict:
     """
     Retrieve the closest configuration from the given timestamp.
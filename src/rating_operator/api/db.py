@@ -1,13 +1,70 @@
+from typing import Callable
+
+from flask import g, has_app_context, has_request_context, request
 from flask.app import Flask
 
 from flask_sqlalchemy import SQLAlchemy
 
+from prometheus_client import Gauge, Histogram
+
 from pyhive import sqlalchemy_presto
 
 from rating_operator.api import config
 
 import sqlalchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+
+
+SQL_QUERIES = Histogram(
+    'rating_api_sql_queries_per_request',
+    'Number of SQL statements executed to serve a request',
+    ['route'],
+    buckets=(1, 2, 5, 10, 20, 50, 100))
+
+
+def pool_usage(measure: Callable) -> Callable:
+    """
+    Build a function measuring the connection pool of the database, for a gauge.
+
+    :measure (Callable) The function reading a value from the pool
+
+    Return a function giving the measure, 0 outside of the application context
+    """
+    def gauge() -> float:
+        return measure(db.engine.pool) if has_app_context() else 0
+    return gauge
+
+
+# Read when Prometheus scrapes the API, to watch the saturation of the pool
+POOL_SIZE = Gauge('rating_api_db_pool_size',
+                  'Number of connections kept by the database pool')
+POOL_SIZE.set_function(pool_usage(lambda pool: pool.size()))
+POOL_CHECKED_OUT = Gauge('rating_api_db_pool_checked_out',
+                         'Number of database connections in use')
+POOL_CHECKED_OUT.set_function(pool_usage(lambda pool: pool.checkedout()))
+POOL_OVERFLOW = Gauge('rating_api_db_pool_overflow',
+                      'Number of database connections opened beyond the pool size')
+POOL_OVERFLOW.set_function(pool_usage(lambda pool: pool.overflow()))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(*args: tuple):
+    """Count the statements executed by the current request, on every engine."""
+    if has_request_context():
+        g.sql_queries = g.get('sql_queries', 0) + 1
+
+
+def record_query_count(exc: BaseException = None):
+    """
+    Record the number of statements executed by the request, once it is over.
+
+    Streamed responses are over once their last chunk is sent.
+
+    :exc (BaseException, optional) The error raised by the request, if any
+    """
+    if request.url_rule is not None:
+        SQL_QUERIES.labels(route=request.url_rule.rule).observe(g.get('sql_queries', 0))
 
 
 def setup_database(app: Flask):
@@ -17,6 +74,7 @@ def setup_database(app: Flask):
     :app (Flask) An initialized Flask object
     """
     db.init_app(app)
+    app.teardown_request(record_query_count)
 
 
 def presto_engine():
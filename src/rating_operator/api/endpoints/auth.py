@@ -4,7 +4,7 @@ import time
 from functools import wraps
 from typing import Any, AnyStr, Callable, Dict, Text
 
-from flask import Blueprint, abort, jsonify, make_response, redirect
+from flask import Blueprint, abort, make_response, redirect
 from flask import Response, render_template, request, session
 
 from keycloak import KeycloakOpenID, exceptions
@@ -19,7 +19,8 @@ from passlib.context import CryptContext
 from rating_operator.api.config import envvar, envvar_string
 from rating_operator.api.endpoints import grafana as grafana
 from rating_operator.api.queries import auth as query
-from rating_operator.api.secret import get_client
+from rating_operator.api.secret import get_core_v1_api
+from rating_operator.api.serialize import fast_jsonify
 
 
 auth_routes = Blueprint('authentication', __name__)
@@ -57,7 +58,7 @@ def with_session(func: Callable) -> Response:
         if isinstance(res, dict):
             total, results = res['total'], res['results']
             response = make_response(
-                jsonify(results=results, total=total),
+                fast_jsonify({'results': results, 'total': total}),
                 200)
         else:
             response = res
@@ -256,7 +257,7 @@ def update_tenant_namespaces(tenant: AnyStr, namespaces: AnyStr):
     :tenant (AnyStr) A string representing the tenant
     :namespaces (AnyStr) the user namespaces
     """
-    api = client.CoreV1Api(get_client())
+    api = get_core_v1_api()
     for namespace in namespaces.split('-'):
         if not tenant:
             continue
@@ -18,6 +18,9 @@ from rating_operator.api.secret import get_client, require_admin
 
 configs_routes = Blueprint('configs', __name__)
 
+# Constant for the process lifetime, resolved once
+_RATING_NAMESPACE = envvar('RATING_NAMESPACE')
+
 
 @configs_routes.route('/ratingrules')
 @as_json
@@ -53,7 +56,7 @@ def rating_rules_list() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingrules',
-            'namespace': envvar('RATING_NAMESPACE')
+            'namespace': _RATING_NAMESPACE
         })
     except ApiException as exc:
         abort(make_response(str(exc), 400))
@@ -175,7 +178,7 @@ def frontend_rating_config(config_name: AnyStr) -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingrules',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'name': config_name
         })
     except ApiException as exc:
@@ -199,7 +202,7 @@ def new_frontend_rating_config() -> Response:
         'kind': 'RatingRule',
         'metadata': {
             'name': received['name'],
-            'namespace': envvar('RATING_NAMESPACE')
+            'namespace': _RATING_NAMESPACE
         },
         'spec': {
             'metrics': received['metrics'],
@@ -212,7 +215,7 @@ def new_frontend_rating_config() -> Response:
         api.create_namespaced_custom_object(**{
             'group': 'rating.smile.fr',
             'version': 'v1',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'plural': 'ratingrules',
             'body': body
         })
@@ -236,7 +239,7 @@ def update_frontend_rating_config() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingrules',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'name': received['name']
         })
 
@@ -248,7 +251,7 @@ def update_frontend_rating_config() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingrules',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'name': received['name'],
             'body': cr
         })
@@ -265,7 +268,7 @@ def delete_frontend_rating_config() -> Response:
         api.delete_namespaced_custom_object(**{
             'group': 'rating.smile.fr',
             'version': 'v1',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'plural': 'ratingrules',
             'name': request.form['name']
         })
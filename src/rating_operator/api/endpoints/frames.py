@@ -7,6 +7,7 @@ from flask.wrappers import Response
 from flask_json import as_json
 
 
+from rating_operator.api.cache import clear_caches
 from rating_operator.api.check import assert_url_params, request_params
 from rating_operator.api.endpoints.auth import with_session
 from rating_operator.api.queries import frames as query
@@ -29,7 +30,7 @@ def table_columns(table: AnyStr) -> Response:
 
     Return a response or nothing.
     """
-    rows = query.get_table_columns(table)
+    rows = query.get_table_columns(table=table)
     return {
         'total': len(rows),
         'results': rows
@@ -89,6 +90,7 @@ def models_frames_add() -> Response:
     received = request.form.to_dict()
     rated_frames = received['rated_frames']
     write_rated_frames(frames=dict_to_list(rated_frames))
+    clear_caches()
     query.update_rated_metrics_object(
         metric=received['metric'],
         last_insert=received['last_insert'])
@@ -112,6 +114,8 @@ def rated_frames_add() -> Response:
     query.update_rated_metrics_object(
         metric=received['metric'],
         last_insert=received['last_insert'])
+    # Cleared once every table is updated, so no stale status gets cached in between
+    clear_caches()
     return {
         'total': 1,
         'results': 1
@@ -125,8 +129,10 @@ def rated_frames_delete() -> Response:
     """Remove rated frames from database."""
     received = request.get_json()
     rows = query.delete_rated_frames(metric=received['metric'])
+    total = query.clear_rated_metrics(metric=received['metric'])
+    clear_caches()
     return {
-        'total': query.clear_rated_metrics(metric=received['metric']),
+        'total': total,
         'results': rows
     }
 
@@ -3,10 +3,11 @@ import logging
 import os
 from typing import AnyStr, Dict, List
 
-from flask import Blueprint, current_app, jsonify, make_response, request, url_for
+from flask import Blueprint, current_app, make_response, request, url_for
 from flask import Response
 
 from rating_operator.api.config import envvar
+from rating_operator.api.serialize import fast_jsonify
 
 import requests
 
@@ -116,7 +117,9 @@ def unallowed_routes() -> tuple:
         '/query',
         '/annotations',
         '/alive',
+        '/alive/prometheus',
         '/rules_metrics',
+        '/namespaces/bulk/rating',
         '/rating/configs/list',
         '/rating/configs/<timestamp>',
         '/presto/<table>/columns',
@@ -213,7 +216,7 @@ def grafana_routes_handshake() -> Response:
 
 
 @grafana_routes.route('/search', methods=['GET', 'POST'])
-def search_grafana_routes() -> jsonify:
+def search_grafana_routes() -> Response:
     """
     Search the url for the Grafana Query.
 
@@ -233,7 +236,7 @@ def search_grafana_routes() -> jsonify:
                 'value': string_rule
             }
             links.append(endpoint)
-    return jsonify(links)
+    return fast_jsonify(links)
 
 
 @grafana_routes.route('/query', methods=['GET', 'POST'])
@@ -274,7 +277,7 @@ def query_metrics() -> Response:
         for response in responses:
             payload.append(response)
     if payload:
-        return make_response(jsonify(payload), 200)
+        return make_response(fast_jsonify(payload), 200)
     return make_response('No metric found', 404)
 
 
@@ -324,21 +327,16 @@ def to_timestamp(epoch):
 def format_timeserie_response(content, additionnal={}):
     data = {}
     response = []
+    if not content or 'frame_begin' not in content[0]:
+        return response
+
+    # Rows of a given query all share the same keys
+    label_keys = [
+        index for index in ['node', 'namespace', 'pod', 'metric']
+        if index in content[0] and index not in additionnal
+    ]
     for row in content:
-        if 'frame_begin' not in row.keys():
-            return response
-
-        sort = {}
-        for index in ['node', 'namespace', 'pod', 'metric']:
-            if index not in row or index in additionnal:
-                continue
-            sort[index] = row[index]
-
-        label_keys = list(sort.keys())
-        if len(label_keys) == 1:
-            label = sort[label_keys[0]]
-        else:
-            label = str(sort)
+        label = tuple(row[index] for index in label_keys)
         if label not in data:
             data[label] = []
 
@@ -348,10 +346,14 @@ def format_timeserie_response(content, additionnal={}):
                 to_timestamp(row['frame_begin'])
             ])
 
-    for key in data.keys():
+    for label, datapoints in data.items():
+        if len(label) == 1:
+            target = label[0]
+        else:
+            target = str(dict(zip(label_keys, label)))
         response.append({
-            'target': key,
-            'datapoints': data[key]
+            'target': target,
+            'datapoints': datapoints
         })
     return response
 
@@ -8,12 +8,16 @@ from flask_json import as_json
 from kubernetes import client
 from kubernetes.client.rest import ApiException
 
+from rating_operator.api.check import request_body
 from rating_operator.api.config import envvar
 from rating_operator.api.secret import get_client
 
 instances_routes = Blueprint('models', __name__)
 LOG = logging.getLogger(__name__)
 
+# Constant for the process lifetime, resolved once
+_RATING_NAMESPACE = envvar('RATING_NAMESPACE')
+
 
 @instances_routes.route('/instances/list')
 @as_json
@@ -25,7 +29,7 @@ def models_rule_list() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingruleinstances',
-            'namespace': envvar('RATING_NAMESPACE')
+            'namespace': _RATING_NAMESPACE
         })
     except ApiException as exc:
         abort(make_response(str(exc), 400))
@@ -45,8 +49,8 @@ def models_rule_get() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingruleinstances',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'name': request.args.to_dict()['name']
+            'namespace': _RATING_NAMESPACE,
+            'name': request.args['name']
         })
     except ApiException as exc:
         abort(make_response(str(exc), 400))
@@ -59,7 +63,7 @@ def models_rule_get() -> Response:
 @instances_routes.route('/instances/add', methods=['POST'])
 def models_instance_add() -> Response:
     """Create a new RatingRuleInstance."""
-    config = request.form or request.get_json()
+    config = request_body()
     metric_name = config['metric_name']
     name = 'rating-rule-instance-' + metric_name
     body_spec = {}
@@ -68,13 +72,13 @@ def models_instance_add() -> Response:
     # Check for template demand, override metric var if exist
     config_vars = list(config)
     if 'template_name' in config_vars:
-        template_name = 'rating-rule-template-' + config['template_name']
+        template_name = f'rating-rule-template-{config["template_name"]}'
         try:
             response = api.get_namespaced_custom_object(**{
                 'group': 'rating.smile.fr',
                 'version': 'v1',
                 'plural': 'ratingruletemplates',
-                'namespace': envvar('RATING_NAMESPACE'),
+                'namespace': _RATING_NAMESPACE,
                 'name': template_name
             })
         except ApiException as exc:
@@ -107,7 +111,7 @@ def models_instance_add() -> Response:
         api.create_namespaced_custom_object(**{
             'group': 'rating.smile.fr',
             'version': 'v1',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'plural': 'ratingruleinstances',
             'body': body
         })
@@ -119,7 +123,7 @@ def models_instance_add() -> Response:
 @instances_routes.route('/instances/edit', methods=['POST'])
 def models_instance_edit() -> Response:
     """Edit a RatingRuleInstance."""
-    config = request.form or request.get_json()
+    config = request_body()
     metric_name = config['metric_name']
     name = 'rating-rule-instance-' + metric_name
     body_spec = {}
@@ -129,13 +133,13 @@ def models_instance_edit() -> Response:
     # Check for template demand
     if 'template_name' in patch_vars:
 
-        template_name = 'rating-rule-template-' + config['template_name']
+        template_name = f'rating-rule-template-{config["template_name"]}'
         try:
             response = api.get_namespaced_custom_object(**{
                 'group': 'rating.smile.fr',
                 'version': 'v1',
                 'plural': 'ratingruletemplates',
-                'namespace': envvar('RATING_NAMESPACE'),
+                'namespace': _RATING_NAMESPACE,
                 'name': template_name
             })
         except ApiException as exc:
@@ -154,7 +158,7 @@ def models_instance_edit() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingruleinstances',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'name': name
         })
 
@@ -174,7 +178,7 @@ def models_instance_edit() -> Response:
             'group': 'rating.smile.fr',
             'version': 'v1',
             'plural': 'ratingruleinstances',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'name': name,
             'body': cr
         })
@@ -187,7 +191,7 @@ def models_instance_edit() -> Response:
 @instances_routes.route('/instances/delete', methods=['POST'])
 def models_metric_delete() -> Response:
     """Delete a RatingRuleInstance."""
-    config = request.form or request.get_json()
+    config = request_body()
     metric_name = config['metric_name']
     name = 'rating-rule-instance-' + metric_name
     api = client.CustomObjectsApi(get_client())
@@ -195,7 +199,7 @@ def models_metric_delete() -> Response:
         api.delete_namespaced_custom_object(**{
             'group': 'rating.smile.fr',
             'version': 'v1',
-            'namespace': envvar('RATING_NAMESPACE'),
+            'namespace': _RATING_NAMESPACE,
             'plural': 'ratingruleinstances',
             'name': name
         })
@@ -1,11 +1,16 @@
-from typing import AnyStr
+import hashlib
+from functools import lru_cache
+from typing import AnyStr, Tuple
 
 from flask import Blueprint, make_response, request
 from flask.wrappers import Response
 
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
 from rating_operator.api import config
-from rating_operator.api.check import request_params
+from rating_operator.api.check import cached_request_params
 from rating_operator.api.queries import metrics as query
+from rating_operator.api.serialize import stream_jsonify
 
 from .auth import with_session
 
@@ -18,6 +23,12 @@ def ping() -> AnyStr:
     return "I'm alive!"
 
 
+@metrics_routes.route('/alive/prometheus')
+def prometheus_metrics() -> Response:
+    """Get the metrics of the API, like the SQL statements per request, for Prometheus."""
+    return make_response(generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST})
+
+
 @metrics_routes.route('/metrics')
 @with_session
 def metrics(tenant: AnyStr) -> Response:
@@ -46,15 +57,11 @@ def metric_rating_max(metric: AnyStr, tenant: AnyStr) -> Response:
 
     Return a response of nothing.
     """
-    config = request_params(request.args)
-    rows = query.get_metric_rating_max(metric=metric,
-                                       start=config['start'],
-                                       end=config['end'],
-                                       tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    config = cached_request_params()
+    return stream_jsonify(query.iter_metric_rating_max(metric=metric,
+                                                       start=config['start'],
+                                                       end=config['end'],
+                                                       tenant_id=tenant))
 
 
 @metrics_routes.route('/metrics/<metric>/ratio')
@@ -68,15 +75,31 @@ def metric_ratio(metric: AnyStr, tenant: AnyStr) -> Response:
 
     Return a response or nothing.
     """
-    config = request_params(request.args)
-    rows = query.get_metric_ratio(metric=metric,
-                                  start=config['start'],
-                                  end=config['end'],
-                                  tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    config = cached_request_params()
+    return stream_jsonify(query.iter_metric_ratio(metric=metric,
+                                                  start=config['start'],
+                                                  end=config['end'],
+                                                  tenant_id=tenant))
+
+
+@metrics_routes.route('/metrics/<metric>/summary')
+@with_session
+def metric_summary(metric: AnyStr, tenant: AnyStr) -> Response:
+    """
+    Get the rating, ratio and max rating of a metric, as a single response.
+
+    Dashboards showing them together make one request, and one query.
+
+    :metric (AnyStr) A string representing the metric.
+    :tenant (AnyStr) A string representing the tenant.
+
+    Return a response or nothing.
+    """
+    config = cached_request_params()
+    return stream_jsonify(query.iter_metric_summary(metric=metric,
+                                                    start=config['start'],
+                                                    end=config['end'],
+                                                    tenant_id=tenant))
 
 
 @metrics_routes.route('/metrics/<metric>/<aggregator>')
@@ -127,15 +150,11 @@ def metric_rating(metric: AnyStr, tenant: AnyStr) -> Response:
 
     Return a response of nothing.
     """
-    config = request_params(request.args)
-    rows = query.get_metric_rating(metric=metric,
-                                   start=config['start'],
-                                   end=config['end'],
-                                   tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    config = cached_request_params()
+    return stream_jsonify(query.iter_metric_rating(metric=metric,
+                                                   start=config['start'],
+                                                   end=config['end'],
+                                                   tenant_id=tenant))
 
 
 @metrics_routes.route('/metrics/<metric>/total_rating')
@@ -149,7 +168,7 @@ def metric_total_rating(metric: AnyStr, tenant: AnyStr) -> Response:
 
     Return a response of nothing.
     """
-    config = request_params(request.args)
+    config = cached_request_params()
     rows = query.get_metric_total_rating(metric=metric,
                                          start=config['start'],
                                          end=config['end'],
@@ -160,11 +179,30 @@ def metric_total_rating(metric: AnyStr, tenant: AnyStr) -> Response:
     }
 
 
+@lru_cache(maxsize=1)
+def rendered_rules_export(revision: Tuple[int, int]) -> Tuple[AnyStr, AnyStr]:
+    """
+    Render the RatingRules export for a given revision of the rules.
+
+    :revision (Tuple) The revision of the rules, as given by config.rules_export_revision
+
+    Return a tuple of the rendered export and its ETag
+    """
+    body = '\n'.join(config.generate_rules_export()) + '\n# EOF\n'
+    etag = hashlib.blake2b(body.encode(), digest_size=8).hexdigest()
+    return body, etag
+
+
 @metrics_routes.route('/rules_metrics')
 def config_lookup_export() -> Response:
     """Export RatingRules for Prometheus."""
-    rows = config.generate_rules_export()
-    return make_response('\n'.join(rows) + '\n# EOF\n', 200)
+    body, etag = rendered_rules_export(config.rules_export_revision())
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(body, 200)
+    response.set_etag(etag)
+    return response
 
 
 @metrics_routes.route('/metrics/rating')
@@ -177,14 +215,10 @@ def metrics_rating(tenant: AnyStr) -> Response:
 
     Return a response or nothing.
     """
-    config = request_params(request.args)
-    rows = query.get_metrics_rating(start=config['start'],
-                                    end=config['end'],
-                                    tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    config = cached_request_params()
+    return stream_jsonify(query.iter_metrics_rating(start=config['start'],
+                                                    end=config['end'],
+                                                    tenant_id=tenant))
 
 
 @metrics_routes.route('/metrics/<metric>/todate')
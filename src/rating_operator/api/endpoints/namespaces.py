@@ -5,15 +5,31 @@ from flask.wrappers import Response
 
 from flask_json import as_json
 
+from rating_operator.api.cache import clear_caches
 from rating_operator.api.check import request_params
 from rating_operator.api.endpoints.auth import with_session
+from rating_operator.api.endpoints.views import range_view
 from rating_operator.api.queries import namespaces as query
 from rating_operator.api.secret import require_admin
+from rating_operator.api.serialize import respond, stream_jsonify
 
 
 namespaces_routes = Blueprint('namespaces', __name__)
 
 
+# Aggregator dispatch, for a specific namespace or for all of them ('rating')
+_NS_SPECIFIC = {
+    'daily': query.get_namespace_rating_daily,
+    'weekly': query.get_namespace_rating_weekly,
+    'monthly': query.get_namespace_rating_monthly
+}
+_NS_ALL = {
+    'daily': query.get_namespaces_rating_daily,
+    'weekly': query.get_namespaces_rating_weekly,
+    'monthly': query.get_namespaces_rating_monthly
+}
+
+
 @namespaces_routes.route('/namespaces')
 @with_session
 def namespaces(tenant: AnyStr) -> Response:
@@ -25,10 +41,7 @@ def namespaces(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     rows = query.get_namespaces(tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
 
 
 @namespaces_routes.route('/namespaces/tenant', methods=['POST'])
@@ -39,6 +52,7 @@ def update_namespace_tenant() -> Response:
     config = request.get_json()
     rows = query.update_namespace(namespace=config['namespace'],
                                   tenant_id=config['tenant_id'])
+    clear_caches()
     return {
         'total': 1,
         'results': rows
@@ -62,24 +76,15 @@ def namespace_rating_aggregator(namespace: AnyStr,
         'tenant_id': tenant
     }
 
-    if namespace != 'rating':
-        params.update({'namespace': namespace})
-
-    try:
-        rows = {
-            (namespace, 'daily'): query.get_namespace_rating_daily,
-            (namespace, 'weekly'): query.get_namespace_rating_weekly,
-            (namespace, 'monthly'): query.get_namespace_rating_monthly,
-            ('rating', 'daily'): query.get_namespaces_rating_daily,
-            ('rating', 'weekly'): query.get_namespaces_rating_weekly,
-            ('rating', 'monthly'): query.get_namespaces_rating_monthly,
-        }[(namespace, aggregator)](**params)
-    except KeyError:
-        rows = [{}]
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    if namespace == 'rating':
+        table = _NS_ALL
+    else:
+        table = _NS_SPECIFIC
+        params['namespace'] = namespace
+
+    func = table.get(aggregator)
+    rows = [{}] if func is None else func(**params)
+    return respond(rows)
 
 
 @namespaces_routes.route('/namespaces/rating')
@@ -93,125 +98,52 @@ def namespaces_rating(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     config = request_params(request.args)
-    rows = query.get_namespaces_rating(
+    if config['limit'] is None:
+        return stream_jsonify(query.iter_namespaces_rating(start=config['start'],
+                                                           end=config['end'],
+                                                           tenant_id=tenant))
+    rows, total = query.get_namespaces_rating(
         start=config['start'],
         end=config['end'],
+        limit=config['limit'],
+        offset=config['offset'],
         tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows, total=total)
 
 
-@namespaces_routes.route('/namespaces/total_rating')
+@namespaces_routes.route('/namespaces/bulk/rating')
 @with_session
-def namespaces_total_rating(tenant: AnyStr) -> Response:
+def namespaces_bulk_rating(tenant: AnyStr) -> Response:
     """
-    Get namespaces aggregated rating.
+    Get the rating of several namespaces, given as a comma separated names parameter.
 
     :tenant (AnyStr) A string representing the tenant.
 
-    Return a response or nothing.
+    Return a response or nothing, with the rating grouped by namespace.
     """
     config = request_params(request.args)
-    rows = query.get_namespaces_total_rating(
-        start=config['start'],
-        end=config['end'],
-        tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@namespaces_routes.route('/namespaces/metrics/rating')
-@with_session
-def namespaces_metrics(tenant: AnyStr) -> Response:
-    """
-    Get namespaces metrics.
-
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_namespaces_metrics_rating(start=config['start'],
-                                               end=config['end'],
-                                               tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@namespaces_routes.route('/namespaces/<namespace>/rating')
-@with_session
-def namespace_rating(namespace: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get the rating of a namespace.
-
-    :namespace (AnyStr) A string representing the tenant.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_namespace_rating(
-        namespace=namespace,
-        start=config['start'],
-        end=config['end'],
-        tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@namespaces_routes.route('/namespaces/<namespace>/total_rating')
-@with_session
-def namespace_total_rating(namespace: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get the aggregated rating of a namespace.
-
-    :namespace (AnyStr) A string representing the tenant.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_namespace_total_rating(
-        namespace=namespace,
-        start=config['start'],
-        end=config['end'],
-        tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@namespaces_routes.route('/namespaces/<namespace>/metrics/<metric>/rating')
-@with_session
-def namespace_metric_rating(namespace: AnyStr,
-                            metric: AnyStr,
-                            tenant: AnyStr) -> Response:
-    """
-    Get the rating of a given namespace and metric.
-
-    :namespace (AnyStr) A string representing the namespace.
-    :metric (AnyStr) A string representing the metric.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_namespace_metric_rating(
-        namespace=namespace,
-        metric=metric,
-        start=config['start'],
-        end=config['end'],
-        tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    names = [name for name in config.get('names', '').split(',') if name]
+    rows = query.get_namespaces_rating_bulk(names=names,
+                                            start=config['start'],
+                                            end=config['end'],
+                                            tenant_id=tenant) if names else []
+    grouped = {name: [] for name in names}
+    for row in rows:
+        grouped[row.pop('namespace')].append(row)
+    return respond(grouped, total=len(rows))
+
+
+# Views returning the rows of a query over the requested time range
+for rule, endpoint, query_fn in (
+        ('/namespaces/total_rating', 'namespaces_total_rating',
+         query.get_namespaces_total_rating),
+        ('/namespaces/metrics/rating', 'namespaces_metrics',
+         query.get_namespaces_metrics_rating),
+        ('/namespaces/<namespace>/rating', 'namespace_rating',
+         query.get_namespace_rating),
+        ('/namespaces/<namespace>/total_rating', 'namespace_total_rating',
+         query.get_namespace_total_rating),
+        ('/namespaces/<namespace>/metrics/<metric>/rating', 'namespace_metric_rating',
+         query.get_namespace_metric_rating),
+):
+    namespaces_routes.add_url_rule(rule, endpoint, range_view(query_fn))
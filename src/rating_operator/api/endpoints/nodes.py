@@ -5,13 +5,28 @@ from flask.wrappers import Response
 
 from rating_operator.api.check import request_params
 from rating_operator.api.queries import nodes as query
+from rating_operator.api.serialize import respond, stream_jsonify
 
 from .auth import with_session
+from .views import range_view
 
 
 nodes_routes = Blueprint('nodes', __name__)
 
 
+# Aggregator dispatch, for a specific node or for all of them ('rating')
+_NODES_SPECIFIC = {
+    'daily': query.get_node_rating_daily,
+    'weekly': query.get_node_rating_weekly,
+    'monthly': query.get_node_rating_monthly
+}
+_NODES_ALL = {
+    'daily': query.get_nodes_rating_daily,
+    'weekly': query.get_nodes_rating_weekly,
+    'monthly': query.get_nodes_rating_monthly
+}
+
+
 @nodes_routes.route('/nodes')
 @with_session
 def nodes(tenant: AnyStr) -> Response:
@@ -23,10 +38,7 @@ def nodes(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     rows = query.get_nodes(tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
 
 
 @nodes_routes.route('/nodes/rating')
@@ -40,13 +52,16 @@ def nodes_rating(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     config = request_params(request.args)
-    rows = query.get_nodes_rating(start=config['start'],
-                                  end=config['end'],
-                                  tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    if config['limit'] is None:
+        return stream_jsonify(query.iter_nodes_rating(start=config['start'],
+                                                      end=config['end'],
+                                                      tenant_id=tenant))
+    rows, total = query.get_nodes_rating(start=config['start'],
+                                         end=config['end'],
+                                         limit=config['limit'],
+                                         offset=config['offset'],
+                                         tenant_id=tenant)
+    return respond(rows, total=total)
 
 
 @nodes_routes.route('/nodes/<node>/<aggregator>')
@@ -67,127 +82,24 @@ def nodes_rating_agg(tenant: AnyStr,
         'tenant_id': tenant,
     }
 
-    if node != 'rating':
-        params.update({'node': node})
-
-    try:
-        rows = {
-            (node, 'daily'): query.get_node_rating_daily,
-            (node, 'weekly'): query.get_node_rating_weekly,
-            (node, 'monthly'): query.get_node_rating_monthly,
-            ('rating', 'daily'): query.get_nodes_rating_daily,
-            ('rating', 'weekly'): query.get_nodes_rating_weekly,
-            ('rating', 'monthly'): query.get_nodes_rating_monthly,
-        }[(node, aggregator)](**params)
-    except KeyError:
-        rows = [{}]
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@nodes_routes.route('/nodes/metrics/rating')
-@with_session
-def nodes_metrics_rating(tenant: AnyStr) -> Response:
-    """
-    Get the nodes metrics.
-
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_nodes_metrics_rating(start=config['start'],
-                                          end=config['end'],
-                                          tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@nodes_routes.route('/nodes/total_rating')
-@with_session
-def nodes_total_rating(tenant: AnyStr) -> Response:
-    """
-    Get the nodes agglomerated rating.
-
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_nodes_total_rating(start=config['start'],
-                                        end=config['end'],
-                                        tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@nodes_routes.route('/nodes/<node>/rating')
-@with_session
-def node_rating(node: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get the rating for a given node.
-
-    :node (AnyStr) A string representing the node.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_node_rating(node=node,
-                                 start=config['start'],
-                                 end=config['end'],
-                                 tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@nodes_routes.route('/nodes/<node>/total_rating')
-@with_session
-def node_total_rating(node: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get the agglomerated rating for the nodes.
-
-    :node (AnyStr) A string representing the node.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_node_total_rating(node=node,
-                                       start=config['start'],
-                                       end=config['end'],
-                                       tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@nodes_routes.route('/nodes/metrics/<metric>/rating')
-@with_session
-def nodes_metric_rating(metric: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get the rating for a given metric.
-
-    :metric (AnyStr) A string representing the namespace.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_nodes_metric_rating(metric=metric,
-                                         start=config['start'],
-                                         end=config['end'],
-                                         tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    if node == 'rating':
+        table = _NODES_ALL
+    else:
+        table = _NODES_SPECIFIC
+        params['node'] = node
+
+    func = table.get(aggregator)
+    rows = [{}] if func is None else func(**params)
+    return respond(rows)
+
+
+# Views returning the rows of a query over the requested time range
+for rule, endpoint, query_fn in (
+        ('/nodes/metrics/rating', 'nodes_metrics_rating', query.get_nodes_metrics_rating),
+        ('/nodes/total_rating', 'nodes_total_rating', query.get_nodes_total_rating),
+        ('/nodes/<node>/rating', 'node_rating', query.get_node_rating),
+        ('/nodes/<node>/total_rating', 'node_total_rating', query.get_node_total_rating),
+        ('/nodes/metrics/<metric>/rating', 'nodes_metric_rating',
+         query.get_nodes_metric_rating),
+):
+    nodes_routes.add_url_rule(rule, endpoint, range_view(query_fn))
@@ -5,31 +5,26 @@ from flask.wrappers import Response
 
 from rating_operator.api.check import request_params
 from rating_operator.api.queries import pods as query
+from rating_operator.api.serialize import respond, stream_jsonify
 
 from .auth import with_session
+from .views import range_view, tenant_etag
 
 
 pods_routes = Blueprint('pods', __name__)
 
 
-@pods_routes.route('/pods')
-@with_session
-def pods(tenant: AnyStr) -> Response:
-    """
-    Get pods.
-
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pods(start=config['start'],
-                          end=config['end'],
-                          tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+# Aggregator dispatch, for a specific pod or for all of them ('rating')
+_PODS_SPECIFIC = {
+    'daily': query.get_pod_rating_daily,
+    'weekly': query.get_pod_rating_weekly,
+    'monthly': query.get_pod_rating_monthly
+}
+_PODS_ALL = {
+    'daily': query.get_pods_rating_daily,
+    'weekly': query.get_pods_rating_weekly,
+    'monthly': query.get_pods_rating_monthly
+}
 
 
 @pods_routes.route('/pods/<pod>/lifetime')
@@ -45,10 +40,7 @@ def pod_lifetime(pod: AnyStr, tenant: AnyStr) -> Response:
     """
     rows = query.get_pod_lifetime(pod=pod,
                                   tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
 
 
 @pods_routes.route('/pods/metrics/rating')
@@ -62,13 +54,12 @@ def pods_metrics_rating(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     config = request_params(request.args)
-    rows = query.get_pods_metrics_rating(start=config['start'],
-                                         end=config['end'],
-                                         tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    rows, total = query.get_pods_metrics_rating(start=config['start'],
+                                                end=config['end'],
+                                                limit=config['limit'],
+                                                offset=config['offset'],
+                                                tenant_id=tenant)
+    return respond(rows, total=total)
 
 
 @pods_routes.route('/pods/rating')
@@ -82,33 +73,16 @@ def pods_rating(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     config = request_params(request.args)
-    rows = query.get_pods_rating(start=config['start'],
-                                 end=config['end'],
-                                 tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@pods_routes.route('/pods/total_rating')
-@with_session
-def pods_total_rating(tenant: AnyStr) -> Response:
-    """
-    Get pods aggregated rating.
-
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pods_total_rating(start=config['start'],
-                                       end=config['end'],
-                                       tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    if config['limit'] is None:
+        return stream_jsonify(query.iter_pods_rating(start=config['start'],
+                                                     end=config['end'],
+                                                     tenant_id=tenant))
+    rows, total = query.get_pods_rating(start=config['start'],
+                                        end=config['end'],
+                                        limit=config['limit'],
+                                        offset=config['offset'],
+                                        tenant_id=tenant)
+    return respond(rows, total=total)
 
 
 @pods_routes.route('/pods/<pod>/<aggregator>')
@@ -129,28 +103,20 @@ def pods_rating_agg(tenant: AnyStr,
         'tenant_id': tenant,
     }
 
-    if pod != 'rating':
-        params.update({'pod': pod})
-
-    try:
-        rows = {
-            (pod, 'daily'): query.get_pod_rating_daily,
-            (pod, 'weekly'): query.get_pod_rating_weekly,
-            (pod, 'monthly'): query.get_pod_rating_monthly,
-            ('rating', 'daily'): query.get_pods_rating_daily,
-            ('rating', 'weekly'): query.get_pods_rating_weekly,
-            ('rating', 'monthly'): query.get_pods_rating_monthly,
-        }[(pod, aggregator)](**params)
-    except KeyError:
-        rows = [{}]
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    if pod == 'rating':
+        table = _PODS_ALL
+    else:
+        table = _PODS_SPECIFIC
+        params['pod'] = pod
+
+    func = table.get(aggregator)
+    rows = [{}] if func is None else func(**params)
+    return respond(rows)
 
 
 @pods_routes.route('/pods/rating/daily')
 @with_session
+@tenant_etag(ranged=False)
 def pods_rating_daily(tenant: AnyStr) -> Response:
     """
     Get pods daily rating.
@@ -160,14 +126,12 @@ def pods_rating_daily(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     rows = query.get_pods_rating_daily(tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
 
 
 @pods_routes.route('/pods/rating/weekly')
 @with_session
+@tenant_etag(ranged=False)
 def pods_rating_weekly(tenant: AnyStr) -> Response:
     """
     Get pods weekly rating.
@@ -177,14 +141,12 @@ def pods_rating_weekly(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     rows = query.get_pods_rating_weekly(tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
 
 
 @pods_routes.route('/pods/rating/monthly')
 @with_session
+@tenant_etag(ranged=False)
 def pods_rating_monthly(tenant: AnyStr) -> Response:
     """
     Get pods monthly rating.
@@ -194,101 +156,18 @@ def pods_rating_monthly(tenant: AnyStr) -> Response:
     Return a response or nothing.
     """
     rows = query.get_pods_rating_monthly(tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@pods_routes.route('/pods/<pod>/rating')
-@with_session
-def pod_rating(pod: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get a pod's rating.
-
-    :pod (AnyStr) A string representing the pod.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pod_rating(pod=pod,
-                                start=config['start'],
-                                end=config['end'],
-                                tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@pods_routes.route('/pods/<pod>/total_rating')
-@with_session
-def pod_total_rating(pod: AnyStr, tenant: AnyStr) -> Response:
-    """
-    Get a pod's aggregated rating.
-
-    :pod (AnyStr) A string representing the pod.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pod_total_rating(pod=pod,
-                                      start=config['start'],
-                                      end=config['end'],
-                                      tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@pods_routes.route('/pods/<pod>/metrics/<metric>/rating')
-@with_session
-def pod_metric_rating(pod: AnyStr,
-                      metric: AnyStr,
-                      tenant: AnyStr) -> Response:
-    """
-    Get the rating for a given pod and metric.
-
-    :pod (AnyStr) A string representing the pod.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pod_metric_rating(pod=pod,
-                                       metric=metric,
-                                       start=config['start'],
-                                       end=config['end'],
-                                       tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
-
-
-@pods_routes.route('/pods/<pod>/metrics/<metric>/total_rating')
-@with_session
-def pod_metric_total_rating(pod: AnyStr,
-                            metric: AnyStr,
-                            tenant: AnyStr) -> Response:
-    """
-    Get the aggregated rating for a given pod and metric.
-
-    :pod (AnyStr) A string representing the pod.
-    :tenant (AnyStr) A string representing the tenant.
-
-    Return a response or nothing.
-    """
-    config = request_params(request.args)
-    rows = query.get_pod_metric_total_rating(pod=pod,
-                                             metric=metric,
-                                             start=config['start'],
-                                             end=config['end'],
-                                             tenant_id=tenant)
-    return {
-        'total': len(rows),
-        'results': rows
-    }
+    return respond(rows)
+
+
+# Views returning the rows of a query over the requested time range
+for rule, endpoint, query_fn in (
+        ('/pods', 'pods', query.get_pods),
+        ('/pods/total_rating', 'pods_total_rating', query.get_pods_total_rating),
+        ('/pods/<pod>/rating', 'pod_rating', query.get_pod_rating),
+        ('/pods/<pod>/total_rating', 'pod_total_rating', query.get_pod_total_rating),
+        ('/pods/<pod>/metrics/<metric>/rating', 'pod_metric_rating',
+         query.get_pod_metric_rating),
+        ('/pods/<pod>/metrics/<metric>/total_rating', 'pod_metric_total_rating',
+         query.get_pod_metric_total_rating),
+):
+    pods_routes.add_url_rule(rule, endpoint, range_view(query_fn))
@@ -1,28 +1,203 @@
-from typing import Dict
+import threading
+from concurrent.futures import Future
+from typing import AnyStr, Callable, Dict, List, Tuple
 
 from flask import Blueprint, abort, make_response, request
 from flask.wrappers import Response
 
 from flask_json import as_json
 
-from kubernetes import client
 from kubernetes.client.rest import ApiException
 
-from rating_operator.api.secret import get_client, require_admin
+from rating_operator.api.secret import get_custom_objects_api, require_admin
 
 
 prometheus_routes = Blueprint('prometheus', __name__)
 
 
+# Identifies the rating PrometheusRule, for the CustomObjectsApi calls
+_PROMETHEUS_OBJ = {
+    'group': 'monitoring.coreos.com',
+    'version': 'v1',
+    'plural': 'prometheusrules',
+    'name': 'prometheus-rating.rules',
+    'namespace': 'monitoring'
+}
+
+
 def prometheus_object() -> Dict:
     """Get a basic Prometheus object."""
-    return {
-        'group': 'monitoring.coreos.com',
-        'version': 'v1',
-        'plural': 'prometheusrules',
-        'name': 'prometheus-rating.rules',
-        'namespace': 'monitoring'
+    return _PROMETHEUS_OBJ.copy()
+
+
+class RuleConflictError(Exception):
+    """Simple error class to handle a rule change that cannot be applied."""
+
+    pass
+
+
+def find_group(prom_object: Dict, name: AnyStr) -> Dict:
+    """
+    Find a group of the PrometheusRule object, stopping at the first match.
+
+    :prom_object (Dict) The PrometheusRule object
+    :name (AnyStr) The name of the group
+
+    Return the group, or None if it doesn't exist
+    """
+    return next(
+        (group for group in prom_object['spec']['groups'] if group['name'] == name),
+        None)
+
+
+def add_rule(prom_object: Dict, form: Dict) -> Tuple[AnyStr, bool]:
+    """
+    Add a rule to the PrometheusRule object.
+
+    :prom_object (Dict) The PrometheusRule object, modified in place
+    :form (Dict) The request form, containing group, expr and record
+
+    Return the message to respond with, and whether the object changed
+    """
+    group_name, expr, record = form['group'], form['expr'], form['record']
+    payload = {
+        'expr': expr,
+        'record': record
     }
+    group = find_group(prom_object, group_name)
+    if group is None:
+        prom_object['spec']['groups'].append({
+            'name': group_name,
+            'rules': [payload]
+        })
+    else:
+        existing = {(rule.get('expr'), rule.get('record')) for rule in group['rules']}
+        if (expr, record) in existing:
+            raise RuleConflictError('Metric already exist')
+        group['rules'].append(payload)
+    return 'Metric added', True
+
+
+def edit_rule(prom_object: Dict, form: Dict) -> Tuple[AnyStr, bool]:
+    """
+    Edit the expression of a rule in the PrometheusRule object.
+
+    :prom_object (Dict) The PrometheusRule object, modified in place
+    :form (Dict) The request form, containing group, expr and record
+
+    Return the message to respond with, and whether the object changed
+    """
+    group_name, expr, record = form['group'], form['expr'], form['record']
+    group = find_group(prom_object, group_name)
+    if group is None:
+        return 'Metric edited', False
+    rule = next((rule for rule in group['rules'] if rule.get('record') == record), None)
+    if rule is None or rule['expr'] == expr:
+        return 'Metric edited', False
+    rule['expr'] = expr
+    return 'Metric edited', True
+
+
+def delete_rule(prom_object: Dict, form: Dict) -> Tuple[AnyStr, bool]:
+    """
+    Delete a rule from the PrometheusRule object.
+
+    :prom_object (Dict) The PrometheusRule object, modified in place
+    :form (Dict) The request form, containing group and record
+
+    Return the message to respond with, and whether the object changed
+    """
+    group_name, record = form['group'], form['record']
+    group = find_group(prom_object, group_name)
+    if group is None:
+        return 'Metric removed', False
+    rules = [rule for rule in group['rules'] if rule.get('record') != record]
+    changed = len(rules) != len(group['rules'])
+    group['rules'] = rules
+    return 'Metric removed', changed
+
+
+class RuleChangeBatcher:
+    """
+    Apply concurrent changes to the rating PrometheusRule in batches.
+
+    The first request to arrive applies every pending change with a single GET
+    and a single PATCH, while the others wait for their own result. Changes are
+    serialized, so concurrent edits no longer overwrite each other.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    def submit(self, operation: Callable, form: Dict) -> AnyStr:
+        """
+        Apply a change to the PrometheusRule, batched with the concurrent ones.
+
+        :operation (Callable) The function applying the change to the object
+        :form (Dict) The request form, given to the operation
+
+        Return the message of the operation, or raise its error
+        """
+        future = Future()
+        with self._pending_lock:
+            self._pending.append((operation, form, future))
+        with self._flush_lock:
+            if not future.done():
+                self._flush()
+        return future.result()
+
+    def _flush(self):
+        with self._pending_lock:
+            batch, self._pending = self._pending, []
+        try:
+            self._apply(batch)
+        except Exception as exc:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+
+    def _apply(self, batch: List[Tuple[Callable, Dict, Future]]):
+        api = get_custom_objects_api()
+        prom_object = api.get_namespaced_custom_object(**_PROMETHEUS_OBJ)
+        applied, changed = [], False
+        for operation, form, future in batch:
+            try:
+                message, modified = operation(prom_object, form)
+            except Exception as exc:
+                # The failed change is skipped, without impacting the rest of the batch
+                future.set_exception(exc)
+                continue
+            applied.append((future, message))
+            changed = changed or modified
+        # No-op changes, like an edit to the same expression, don't need a PATCH
+        if changed:
+            api.patch_namespaced_custom_object(**_PROMETHEUS_OBJ, body=prom_object)
+        for future, message in applied:
+            future.set_result(message)
+
+
+rule_changes = RuleChangeBatcher()
+
+
+def apply_rule_change(operation: Callable, fields: Tuple[AnyStr, ...]) -> Response:
+    """
+    Apply a change from the current request to the rating PrometheusRule.
+
+    :operation (Callable) The function applying the change to the object
+    :fields (Tuple[AnyStr, ...]) The form fields required by the operation
+
+    Return the response of the request
+    """
+    form = {field: request.form.get(field) for field in fields}
+    if not all(form.values()):
+        abort(make_response(f'Missing fields, expected: {", ".join(fields)}', 400))
+    try:
+        message = rule_changes.submit(operation, form)
+    except (ApiException, RuleConflictError) as exc:
+        abort(make_response(str(exc), 400))
+    return make_response(message, 200)
 
 
 @prometheus_routes.route('/prometheus/get')
@@ -30,8 +205,8 @@ def prometheus_object() -> Dict:
 def prometheus_config_get() -> Response:
     """Get the rating PrometheusRule."""
     try:
-        api = client.CustomObjectsApi(get_client())
-        response = api.get_namespaced_custom_object(**prometheus_object())
+        api = get_custom_objects_api()
+        response = api.get_namespaced_custom_object(**_PROMETHEUS_OBJ)
     except ApiException as exc:
         abort(make_response(str(exc), 400))
     return {
@@ -42,64 +217,20 @@ def prometheus_config_get() -> Response:
 
 @prometheus_routes.route('/prometheus/add', methods=['POST'])
 @require_admin
-def prometheus_metric_add():
+def prometheus_metric_add() -> Response:
     """Add a rule to the rating PrometheusRule."""
-    api = client.CustomObjectsApi(get_client())
-    prom_object = api.get_namespaced_custom_object(**prometheus_object())
-    found = False
-    payload = {
-        'expr': request.form['expr'],
-        'record': request.form['record']
-    }
-    for group in prom_object['spec']['groups']:
-        if group['name'] == request.form['group']:
-            if payload in group['rules']:
-                abort(make_response('Metric already exist', 400))
-            group['rules'].append(payload)
-            found = True
-    if not found:
-        prom_object['spec']['groups'].append({
-            'name': request.form['group'],
-            'rules': [payload]
-        })
-    try:
-        api.patch_namespaced_custom_object(**prometheus_object(), body=prom_object)
-    except ApiException as exc:
-        abort(make_response(str(exc), 400))
-    return make_response('Metric added', 200)
+    return apply_rule_change(add_rule, ('group', 'expr', 'record'))
 
 
 @prometheus_routes.route('/prometheus/edit', methods=['POST'])
 @require_admin
 def prometheus_metric_edit() -> Response:
     """Edit a rule to the rating PrometheusRule."""
-    api = client.CustomObjectsApi(get_client())
-    prom_object = api.get_namespaced_custom_object(**prometheus_object())
-    for group in prom_object['spec']['groups']:
-        if group['name'] == request.form['group']:
-            for rule in group['rules']:
-                if rule['record'] == request.form['record']:
-                    rule['expr'] = request.form['expr']
-    try:
-        api.patch_namespaced_custom_object(**prometheus_object(), body=prom_object)
-    except ApiException as exc:
-        abort(make_response(str(exc), 400))
-    return make_response('Metric edited', 200)
+    return apply_rule_change(edit_rule, ('group', 'expr', 'record'))
 
 
 @prometheus_routes.route('/prometheus/delete', methods=['POST'])
 @require_admin
 def prometheus_metric_delete() -> Response:
     """Delete a rule to the rating PrometheusRule."""
-    api = client.CustomObjectsApi(get_client())
-    prom_object = api.get_namespaced_custom_object(**prometheus_object())
-    for group in prom_object['spec']['groups']:
-        if group['name'] == request.form['group']:
-            for rule in group['rules']:
-                if rule['record'] == request.form['record']:
-                    group['rules'].remove(rule)
-    try:
-        api.patch_namespaced_custom_object(**prometheus_object(), body=prom_object)
-    except ApiException as exc:
-        abort(make_response(str(exc), 400))
-    return make_response('Metric removed', 200)
+    return apply_rule_change(delete_rule, ('group', 'record'))
@@ -6,35 +6,46 @@ from flask.wrappers import Response
 
 from flask_json import as_json
 
-from kubernetes import client
 from kubernetes.client.rest import ApiException
 
+from rating_operator.api.cache import TTLCache
+from rating_operator.api.check import request_body
 from rating_operator.api.config import envvar
 from rating_operator.api.queries import metrics as query
-from rating_operator.api.secret import get_client
+from rating_operator.api.secret import get_custom_objects_api
 
 
 templates_routes = Blueprint('templates', __name__)
 LOG = logging.getLogger(__name__)
 
+# Identifies the RatingRuleTemplate objects, for the CustomObjectsApi calls
+_TEMPLATE_KW = {
+    'group': 'rating.smile.fr',
+    'version': 'v1',
+    'plural': 'ratingruletemplates',
+    'namespace': envvar('RATING_NAMESPACE')
+}
+
+# The template and metric listings, dropped by the handlers modifying them
+_listings = TTLCache(ttl=30, maxsize=2)
+
 
 @templates_routes.route('/templates/list')
 @as_json
 def models_template_list() -> Response:
     """List all the RatingRuleTemplate."""
-    try:
-        api = client.CustomObjectsApi(get_client())
-        response = api.list_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'plural': 'ratingruletemplates',
-            'namespace': envvar('RATING_NAMESPACE')
-        })
-    except ApiException as exc:
-        abort(make_response(str(exc), 400))
+    names = _listings.get('templates')
+    if names is None:
+        try:
+            api = get_custom_objects_api()
+            response = api.list_namespaced_custom_object(**_TEMPLATE_KW)
+        except ApiException as exc:
+            abort(make_response(str(exc), 400))
+        names = [item['metadata']['name'] for item in response['items']]
+        _listings.set('templates', names)
     return {
-        'results': [item['metadata']['name'] for item in response['items']],
-        'total': len(response['items'])
+        'results': names,
+        'total': len(names)
     }
 
 
@@ -42,16 +53,10 @@ def models_template_list() -> Response:
 @as_json
 def models_template_get() -> Response:
     """Get a RatingRuleTemplate."""
-    api = client.CustomObjectsApi(get_client())
-    template_name = 'rating-rule-template-' + request.args.to_dict()['query_name']
+    api = get_custom_objects_api()
+    template_name = f'rating-rule-template-{request.args["query_name"]}'
     try:
-        response = api.get_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'plural': 'ratingruletemplates',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'name': template_name
-        })
+        response = api.get_namespaced_custom_object(**_TEMPLATE_KW, name=template_name)
     except ApiException as exc:
         abort(make_response(str(exc), 400))
     return {
@@ -63,14 +68,13 @@ def models_template_get() -> Response:
 @templates_routes.route('/templates/add', methods=['POST'])
 def models_template_new() -> Response:
     """Create a RatingRuleTemplate."""
-    config = request.form or request.get_json()
+    config = request_body()
     name = config['query_name']
     template_group = config['query_group']
     tempalte = config['query_template']
-    template_name = 'rating-rule-template-' + name
+    template_name = f'rating-rule-template-{name}'
 
-    # datetimeobj = datetime.datetime.now()
-    # template_id = datetimeobj.strftime('%d-%b-%Y (%H:%M:%S.%f)')
+    # template_id = datetime.datetime.now()
     # query.store_template_conf(template_id, name, template_group, tempalte, '')
     body_spec = {}
     body_spec['query_name'] = name
@@ -84,59 +88,42 @@ def models_template_new() -> Response:
         },
         'spec': body_spec
     }
-    api = client.CustomObjectsApi(get_client())
+    api = get_custom_objects_api()
     try:
-        api.create_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'plural': 'ratingruletemplates',
-            'body': body
-        })
+        api.create_namespaced_custom_object(**_TEMPLATE_KW, body=body)
     except ApiException as exc:
         abort(make_response(str(exc), 400))
+    _listings.pop('templates')
     return make_response(f'RatingRuleTemplate {config["query_name"]} created', 200)
 
 
 @templates_routes.route('/templates/delete', methods=['POST'])
 def models_template_delete() -> Response:
     """Delete a RatingRuleTemplate."""
-    config = request.form or request.get_json()
+    config = request_body()
     query.delete_template_conf(config['query_name'])
-    template_name = 'rating-rule-template-' + config['query_name']
-    api = client.CustomObjectsApi(get_client())
+    template_name = f'rating-rule-template-{config["query_name"]}'
+    api = get_custom_objects_api()
     try:
-        api.delete_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'plural': 'ratingruletemplates',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'name': template_name
-        })
+        api.delete_namespaced_custom_object(**_TEMPLATE_KW, name=template_name)
     except ApiException as exc:
         abort(make_response(str(exc), 400))
+    _listings.pop('templates')
     return make_response(f'RatingRuleTemplate {config["query_name"]} deleted', 200)
 
 
 @templates_routes.route('/templates/edit', methods=['POST'])
 def models_template_edit() -> Response:
     """Edit a RatingRuleTemplate."""
-    config = request.form or request.get_json()
+    config = request_body()
     name = config['query_name']
-    template_name = 'rating-rule-template-' + name
+    template_name = f'rating-rule-template-{name}'
 
-    datetimeobj = datetime.datetime.now()
-    template_id = datetimeobj.strftime('%d-%b-%Y (%H:%M:%S.%f)')
+    template_id = datetime.datetime.now()
 
-    api = client.CustomObjectsApi(get_client())
+    api = get_custom_objects_api()
     try:
-        cr = api.get_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'plural': 'ratingruletemplates',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'name': template_name
-        })
+        cr = api.get_namespaced_custom_object(**_TEMPLATE_KW, name=template_name)
 
         query_template = config.get('query_template', cr['spec']['query_template'])
         query_name = config.get('query_name', cr['spec']['query_name']),
@@ -148,26 +135,23 @@ def models_template_edit() -> Response:
             'query_group': query_group
         }
 
-        api.patch_namespaced_custom_object(**{
-            'group': 'rating.smile.fr',
-            'version': 'v1',
-            'plural': 'ratingruletemplates',
-            'namespace': envvar('RATING_NAMESPACE'),
-            'name': template_name,
-            'body': cr
-        })
+        api.patch_namespaced_custom_object(**_TEMPLATE_KW, name=template_name, body=cr)
 
         query.store_template_conf(template_id, name, query_group,
                                   query_template, '')
     except ApiException as exc:
         abort(make_response(str(exc), 400))
+    _listings.pop('templates')
     return make_response(f'RatingRuleTemplate {config["query_name"]} edited', 200)
 
 
 @templates_routes.route('/templates/metric/list')
 def models_metric_list() -> Response:
     """List all RatingRuleInstance configurations."""
-    metrics = query.list_metric_conf()
+    metrics = _listings.get('metrics')
+    if metrics is None:
+        metrics = query.list_metric_conf()
+        _listings.set('metrics', metrics)
     return make_response(
         jsonify(metrics=metrics, total=len(metrics)), 200)
 
@@ -175,8 +159,8 @@ def models_metric_list() -> Response:
 @templates_routes.route('/templates/metric/get')
 def models_metric_get() -> Response:
     """Get RatingRuleInstance configurations."""
-    name = request.args.to_dict()['metric_name']
-    metrics = query.get_metric_conf(name)
+    name = request.args['metric_name']
+    metrics = query.get_metric_conf(name=name)
     return make_response(
         jsonify(metrics=metrics, total=len(metrics)), 200)
 
@@ -184,8 +168,9 @@ def models_metric_get() -> Response:
 @templates_routes.route('/templates/metric/delete', methods=['POST'])
 def template_metric_delete() -> Response:
     """Delete configurations of RatingRuleInstance in the database."""
-    config = request.form or request.get_json()
+    config = request_body()
     query.delete_metric_conf(config['metric_name'])
+    _listings.pop('metrics')
     return {
         'total': 1,
         'results': f'RatingRuleValues {config["metric_name"]} deleted'
@@ -195,15 +180,15 @@ def template_metric_delete() -> Response:
 @templates_routes.route('/templates/metric/add', methods=['POST'])
 def models_metric_add():
     """Save RatingRuleInstance configurations to database."""
-    config = request.form or request.get_json()
+    config = request_body()
     metric_name = config['metric_name']
     template_name = ''
     timeframe = config['timeframe']
     par = str(config['cpu']) + '-' + str(config['memory']) + '-' + str(config['price'])
-    datetimeobj = datetime.datetime.now()
-    metric_id = datetimeobj.strftime('%d-%b-%Y (%H:%M:%S.%f)')
+    metric_id = datetime.datetime.now()
     query.store_metric_conf(metric_id, metric_name, timeframe,
                             par, template_name)
+    _listings.pop('metrics')
     return {
         'total': 1,
         'results': f'RatingRuleValues {config["metric_name"]} stored'
@@ -213,11 +198,10 @@ def models_metric_add():
 @templates_routes.route('/templates/instance/add', methods=['POST'])
 def models_db_instance_add():
     """Save the history of the RatingRuleInstances in database."""
-    config = request.form or request.get_json()
+    config = request_body()
     instance_name = config['metric_name']
     instance_promql = config['promql']
-    datetimeobj = datetime.datetime.now()
-    start_time = datetimeobj.strftime('%d-%b-%Y (%H:%M:%S.%f)')
+    start_time = datetime.datetime.now()
     end_time = None
     body_spec = {}
     config_vars = {'cpu', 'memory', 'price'}
@@ -235,10 +219,9 @@ def models_db_instance_add():
 @templates_routes.route('/templates/instance/delete', methods=['POST'])
 def models_db_instance_delete():
     """Delete RatingRuleInstances in database."""
-    config = request.form or request.get_json()
+    config = request_body()
     instance_name = config['metric_name']
-    datetimeobj = datetime.datetime.now()
-    end_time = datetimeobj.strftime('%d-%b-%Y (%H:%M:%S.%f)')
+    end_time = datetime.datetime.now()
     query.delete_instance_conf(instance_name, end_time)
     return {
         'total': 1,
@@ -2,10 +2,12 @@ from flask import Blueprint, abort, jsonify, make_response
 from flask import request, session
 from flask.wrappers import Response
 
+from rating_operator.api.cache import clear_caches
 from rating_operator.api.check import assert_url_params, request_params
 from rating_operator.api.queries import auth as query
 from rating_operator.api.queries import namespaces as ns
 from rating_operator.api.secret import require_admin
+from rating_operator.api.utils import map_in_request
 
 
 tenants_routes = Blueprint('tenants', __name__)
@@ -34,7 +36,9 @@ def request_tenant() -> Response:
 @tenants_routes.route('/tenants', methods=['GET'])
 @require_admin
 def get_tenants() -> Response:
-    """Get all the tenants."""
+    """Get all the tenants, or only their number with count_only=1."""
+    if request.args.get('count_only') in ('1', 'true'):
+        return make_response(jsonify(total=query.get_tenants_count()), 200)
     results = query.get_tenants()
     return make_response(
         jsonify(results=results, total=len(results)), 200)
@@ -46,12 +50,11 @@ def link_namespace() -> Response:
     """Assign a namespace to a tenant."""
     namespaces = request.form.get('namespace')
     tenant = request.form.get('tenant')
-    total = 0
     if isinstance(namespaces, str):
         namespaces = [namespaces]
-    for namespace in namespaces:
-        total += query.link_namespace(tenant, namespace)
-        ns.modify_namespace(tenant, namespace)
+    total = query.link_namespaces(tenant, namespaces)
+    map_in_request(ns.modify_namespace, [tenant] * len(namespaces), namespaces)
+    clear_caches()
     if total:
         return make_response(jsonify(total=total), 200)
     abort(make_response(jsonify(total=0)), 404)
@@ -65,6 +68,7 @@ def unlink_namespace() -> Response:
     if namespace:
         results = query.unlink_namespace(namespace)
         ns.modify_namespace(None, namespace)
+        clear_caches()
         return make_response(jsonify(total=results), 200)
     abort(make_response(jsonify(total=0), 404))
 
@@ -77,9 +81,9 @@ def delete_tenants() -> Response:
     if tenant == '':
         return make_response(jsonify(total=0, results=[{}]), 404)
     tenant_namespaces = query.get_tenant_namespaces(tenant)
-    for namespace in tenant_namespaces:
-        ns.delete_namespace(namespace)
+    map_in_request(ns.delete_namespace, tenant_namespaces)
     results = query.delete_tenant(tenant)
+    clear_caches()
     code = 200
     if results == 0:
         code = 404
@@ -0,0 +1,78 @@
+import datetime
+import hashlib
+from functools import wraps
+from typing import AnyStr, Callable, Dict
+
+from flask import after_this_request, make_response, request
+from flask.wrappers import Response
+
+from rating_operator.api.cache import data_revision
+from rating_operator.api.check import request_params
+from rating_operator.api.endpoints.auth import with_session
+from rating_operator.api.serialize import respond
+
+
+def tenant_etag(ranged: bool = True) -> Callable:
+    """
+    Answer 304 Not Modified while the tenant data is unchanged since the client copy.
+
+    The ETag covers the tenant, the data revision, the current day and the request.
+    Meant to be used as a decorator under with_session.
+
+    :ranged (bool) Whether the view reads the start and end parameters, the ETag is
+    skipped when they are missing, as the default range follows the clock
+
+    Return the decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(tenant: AnyStr, **kwargs: Dict) -> Response:
+            """
+            Compare the ETag of the request, before calling the decorated view.
+
+            :tenant (AnyStr) A string representing the tenant.
+            :kwargs (Dict) A dictionary containing all the view parameters
+
+            Return a 304 response, or the result of the decorated view
+            """
+            if ranged and ('start' not in request.args or 'end' not in request.args):
+                return func(tenant=tenant, **kwargs)
+            key = (tenant, data_revision(), datetime.date.today(), request.full_path)
+            etag = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+            if request.if_none_match.contains_weak(etag):
+                response = make_response('', 304)
+                response.set_etag(etag, weak=True)
+                return response
+
+            @after_this_request
+            def add_etag(response: Response) -> Response:
+                if response.status_code == 200:
+                    response.set_etag(etag, weak=True)
+                    response.headers['Cache-Control'] = 'private, no-cache'
+                return response
+            return func(tenant=tenant, **kwargs)
+        return wrapper
+    return decorator
+
+
+def range_view(query_fn: Callable) -> Callable:
+    """
+    Build a view returning the rows of a query over the requested time range.
+
+    The path parameters of the route are given to the query, along with the
+    start, end and tenant.
+
+    :query_fn (Callable) The query function, called with keyword arguments
+
+    Return the view function, to register in a blueprint
+    """
+    @with_session
+    @tenant_etag(ranged=True)
+    def view(tenant: AnyStr, **kwargs: Dict) -> Response:
+        config = request_params(request.args)
+        return respond(query_fn(start=config['start'],
+                                end=config['end'],
+                                tenant_id=tenant,
+                                **kwargs))
+    view.__doc__ = query_fn.__doc__
+    return view
@@ -5,8 +5,6 @@ from pathlib import Path
 from textwrap import dedent
 from typing import Dict
 
-import pkg_resources
-
 from sqlalchemy import text
 from sqlalchemy.engine import Engine
 
@@ -29,6 +27,17 @@ schema_version_table = dedent("""
     );
 """)
 
+# The scripts ship next to this module, they are listed once per process
+_SQL_DIR = Path(__file__).with_name('scripts')
+_RENUM = re.compile(r'\d+')
+_SCRIPTS = {
+    int(_RENUM.match(script.name).group()): script
+    for script in _SQL_DIR.glob('*.sql')
+}
+
+_SELECT_VERSION = text('SELECT version FROM schema_version')
+_UPDATE_VERSION = text('UPDATE schema_version SET version=:version')
+
 
 def fetch_scripts() -> Dict:
     """
@@ -36,14 +45,7 @@ def fetch_scripts() -> Dict:
 
     Return a dictionary of version:script couples
     """
-    sql_dir = Path(pkg_resources.resource_filename('rating_operator.api', 'postgres'),
-                   'scripts')
-    renum = re.compile('\\d+')
-
-    return {
-        int(renum.match(script.name).group()): script
-        for script in sql_dir.glob('*.sql')
-    }
+    return _SCRIPTS
 
 
 def db_update(engine: Engine):
@@ -55,10 +57,9 @@ def db_update(engine: Engine):
     scripts = fetch_scripts()
     required_version = max(scripts)
 
-    conn = engine.connect()
-    with conn.begin():
+    with engine.begin() as conn:
         conn.execute(text(schema_version_table))
-        cur_version = conn.execute(text('SELECT version FROM schema_version')).scalar()
+        cur_version = conn.execute(_SELECT_VERSION).scalar()
 
         if cur_version > required_version:
             raise DatabaseError(f'Database schema is at version {cur_version}, which is '
@@ -66,6 +67,7 @@ def db_update(engine: Engine):
 
         if cur_version == required_version:
             logging.info('No schema update required.')
+            return
 
         for script_version, script in sorted(scripts.items()):
             if script_version <= cur_version:
@@ -78,6 +80,5 @@ def db_update(engine: Engine):
                 if query.strip():
                     conn.execute(text(query))
 
-            stmt = text('UPDATE schema_version SET version=:version')
-            conn.execute(stmt.bindparams(version=script_version))
+            conn.execute(_UPDATE_VERSION, {'version': script_version})
         logging.info('Schema update complete.')
@@ -0,0 +1,18 @@
+-- Rating of each pod per frame, summed over the metrics.
+-- Kept up to date when frames are written or deleted, it backs the
+-- daily, weekly and monthly rating queries.
+CREATE TABLE frames_by_object (
+  frame_begin  TIMESTAMP NOT NULL,
+  namespace    VARCHAR(253) NOT NULL,
+  node         VARCHAR(253) NOT NULL,
+  pod          VARCHAR(253) NOT NULL,
+  frame_price  DOUBLE PRECISION,
+  PRIMARY KEY  (frame_begin, namespace, node, pod)
+);
+
+INSERT INTO frames_by_object
+SELECT frame_begin, namespace, node, pod, sum(frame_price)
+FROM frames
+WHERE namespace != 'unspecified'
+AND pod != 'unspecified'
+GROUP BY frame_begin, namespace, node, pod;
@@ -0,0 +1,7 @@
+-- Queries on a node filter frames on it over a time range.
+CREATE INDEX ON frames (node, frame_begin);
+
+CREATE INDEX ON frames_by_object (namespace, frame_begin);
+
+-- Namespaces are looked up by tenant on every tenant query.
+CREATE INDEX ON namespaces (tenant_id);
@@ -0,0 +1,3 @@
+-- Metric queries filter frames on the tenant namespaces, a metric and a time range,
+-- then aggregate the price by frame: covering them allows index-only scans.
+CREATE INDEX ON frames (namespace, metric, frame_begin, frame_end, frame_price, node);
@@ -0,0 +1,17 @@
+-- Rating of each metric per frame and namespace, summed over the nodes and pods.
+-- Kept up to date when frames are written or deleted, it backs the
+-- daily, weekly and monthly rating of metrics.
+CREATE TABLE frames_by_metric (
+  frame_begin  TIMESTAMP NOT NULL,
+  metric       VARCHAR(253) NOT NULL,
+  namespace    VARCHAR(253) NOT NULL,
+  frame_price  DOUBLE PRECISION,
+  PRIMARY KEY  (frame_begin, metric, namespace)
+);
+
+INSERT INTO frames_by_metric
+SELECT frame_begin, metric, namespace, sum(frame_price)
+FROM frames
+WHERE namespace != 'unspecified'
+AND pod != 'unspecified'
+GROUP BY frame_begin, metric, namespace;
@@ -0,0 +1,4 @@
+-- Per metric ratings filter on a metric and a range of frame_begin, then aggregate
+-- by frame_begin: leading with them returns the frames already ordered for the
+-- GROUP BY and ORDER BY, the namespace is checked from the index.
+CREATE INDEX ON frames (metric, frame_begin, namespace, frame_end, frame_price, node);
@@ -0,0 +1,3 @@
+-- Namespace totals filter frames on the namespaces and a range of frame_begin,
+-- which the metric-first indexes cannot serve.
+CREATE INDEX ON frames (namespace, frame_begin, frame_end);
@@ -1,6 +1,7 @@
 from typing import AnyStr, Dict, List
 
 from rating_operator.api import utils
+from rating_operator.api.cache import cached
 from rating_operator.api.db import db
 
 from sqlalchemy import text
@@ -68,6 +69,7 @@ def update_tenant(tenant: AnyStr, password: AnyStr) -> int:
     return utils.process_query_get_count(qry, params)
 
 
+@utils.request_cached
 def get_group_tenant(tenant: AnyStr) -> List[Dict]:
     """
     Get the group of the tenant.
@@ -138,6 +140,27 @@ def link_namespace(tenant: AnyStr, namespace: AnyStr) -> int:
     return utils.process_query_get_count(qry, params)
 
 
+def link_namespaces(tenant: AnyStr, namespaces: List[AnyStr]) -> int:
+    """
+    Assign several namespaces to a tenant.
+
+    :tenant (AnyStr) A name representing the tenant receiving the namespaces
+    :namespaces (List[AnyStr]) A list of namespaces to assign to the tenant
+
+    Return the number of row updated
+    """
+    qry = text("""
+        UPDATE namespaces
+        SET tenant_id = :tenant
+        WHERE namespace = ANY(:namespaces)
+    """)
+    params = {
+        'tenant': tenant,
+        'namespaces': list(namespaces)
+    }
+    return utils.process_query_get_count(qry, params)
+
+
 def unlink_namespace(namespace: AnyStr) -> int:
     """
     Remove assignation of a namespace to a tenant.
@@ -175,6 +198,7 @@ def delete_tenant(tenant: AnyStr) -> int:
     return utils.process_query_get_count(qry, params)
 
 
+@cached(ttl=60)
 def get_tenants() -> List[Dict]:
     """
     Get a list of tenant IDs.
@@ -186,7 +210,21 @@ def get_tenants() -> List[Dict]:
         FROM namespaces
         GROUP BY tenant_id
     """)
-    return [dict(row) for row in db.engine.execute(qry)]
+    return [{'tenant_id': tenant} for tenant in db.engine.execute(qry).scalars()]
+
+
+@cached(ttl=60)
+def get_tenants_count() -> int:
+    """
+    Count the tenants owning namespaces.
+
+    Return the number of tenants
+    """
+    qry = text("""
+        SELECT count(DISTINCT tenant_id)
+        FROM namespaces
+    """)
+    return db.engine.execute(qry).scalar()
 
 
 def get_tenant_namespaces(tenant: AnyStr) -> List[AnyStr]:
@@ -205,4 +243,4 @@ def get_tenant_namespaces(tenant: AnyStr) -> List[AnyStr]:
     params = {
         'tenant': tenant
     }
-    return [row[0] for row in db.engine.execute(qry.params(**params))]
+    return db.engine.execute(qry.params(**params)).scalars().all()
@@ -1,19 +1,32 @@
 from typing import AnyStr, Dict, List
 
-from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 
 from rating_operator.api import utils
+from rating_operator.api.cache import cached
 from rating_operator.api.config import envvar
-from rating_operator.api.secret import get_client
+from rating_operator.api.db import db
+from rating_operator.api.secret import get_custom_objects_api, load_incluster_config
 
 import sqlalchemy as sa
 
 
+# Identifies the RatedMetric objects, for the CustomObjectsApi calls
+_RATED_METRIC_KW = {
+    'group': 'rating.smile.fr',
+    'version': 'v1',
+    'plural': 'ratedmetrics',
+    'namespace': envvar('RATING_NAMESPACE')
+}
+
+
+@cached(ttl=300, maxsize=128)
 def get_table_columns(table: AnyStr) -> List[Dict]:
     """
     Get the column name for a given table.
 
+    The Presto schema rarely changes, the columns are kept for five minutes.
+
     :table (AnyStr) A name representing the table
 
     Return a dict with the results
@@ -102,15 +115,14 @@ def update_rated_metrics_object(metric: AnyStr, last_insert: AnyStr):
     :metric (AnyStr) A name representing the metric to be updated
     :last_insert (AnyStr) The timestamp of the latest data frame rating
     """
-    config.load_incluster_config()
+    load_incluster_config()
     rated_metric = f'rated-{metric.replace("_", "-")}'
-    rated_namespace = envvar('RATING_NAMESPACE')
-    custom_api = client.CustomObjectsApi(get_client())
+    custom_api = get_custom_objects_api()
     body = {
         'apiVersion': 'rating.smile.fr/v1',
         'kind': 'RatedMetric',
         'metadata': {
-            'namespace': rated_namespace,
+            'namespace': _RATED_METRIC_KW['namespace'],
             'name': rated_metric,
         },
         'spec': {
@@ -119,20 +131,12 @@ def update_rated_metrics_object(metric: AnyStr, last_insert: AnyStr):
         }
     }
     try:
-        custom_api.create_namespaced_custom_object(group='rating.smile.fr',
-                                                   version='v1',
-                                                   namespace=rated_namespace,
-                                                   plural='ratedmetrics',
-                                                   body=body)
+        custom_api.create_namespaced_custom_object(**_RATED_METRIC_KW, body=body)
     except ApiException as exc:
         if exc.status != 409:
             raise exc
-        custom_api.patch_namespaced_custom_object(group='rating.smile.fr',
-                                                  version='v1',
-                                                  namespace=rated_namespace,
-                                                  plural='ratedmetrics',
-                                                  name=rated_metric,
-                                                  body=body)
+        custom_api.patch_namespaced_custom_object(**_RATED_METRIC_KW,
+                                                  name=rated_metric, body=body)
 
 
 def update_rated_namespaces(namespaces: List[AnyStr],
@@ -145,18 +149,21 @@ def update_rated_namespaces(namespaces: List[AnyStr],
 
     Return the number of updated namespaces
     """
-    for namespace in namespaces:
-        qry = sa.text("""
-            INSERT INTO namespace_status (namespace, last_update)
-            VALUES (:namespace, :last_update)
-            ON CONFLICT ON CONSTRAINT namespace_status_pkey
-            DO UPDATE SET last_update = EXCLUDED.last_update
-        """)
-        params = {
-            'namespace': namespace,
-            'last_update': last_insert
-        }
-        utils.process_query(qry, params)
+    if not namespaces:
+        return 0
+    qry = sa.text("""
+        INSERT INTO namespace_status (namespace, last_update)
+        VALUES (:namespace, :last_update)
+        ON CONFLICT ON CONSTRAINT namespace_status_pkey
+        DO UPDATE SET last_update = EXCLUDED.last_update
+    """)
+    params = [
+        {'namespace': namespace, 'last_update': last_insert}
+        for namespace in dict.fromkeys(namespaces)
+    ]
+    # Sent as a single multi-row INSERT by psycopg2, a namespace may only appear once
+    with db.engine.begin() as conn:
+        conn.execute(qry, params)
     return len(namespaces)
 
 
@@ -186,14 +193,44 @@ def delete_rated_frames(metric: AnyStr) -> int:
 
     Return the number of row deleted
     """
+    touched = sa.text("""
+        SELECT DISTINCT frame_begin
+        FROM frames
+        WHERE metric = :metric
+    """)
     qry = sa.text("""
         DELETE FROM frames
         WHERE metric = :metric
     """)
+    by_metric = sa.text("""
+        DELETE FROM frames_by_metric
+        WHERE metric = :metric
+    """)
+    # Only the frames the metric was rated in are summed again
+    clear_by_object = sa.text("""
+        DELETE FROM frames_by_object
+        WHERE frame_begin = ANY(:frames)
+    """)
+    by_object = sa.text("""
+        INSERT INTO frames_by_object
+        SELECT frame_begin, namespace, node, pod, sum(frame_price)
+        FROM frames
+        WHERE frame_begin = ANY(:frames)
+        AND namespace != 'unspecified'
+        AND pod != 'unspecified'
+        GROUP BY frame_begin, namespace, node, pod
+    """)
     params = {
         'metric': metric
     }
-    return utils.process_query_get_count(qry, params)
+    with db.engine.begin() as conn:
+        frames = [row[0] for row in conn.execute(touched.params(**params))]
+        res = conn.execute(qry.params(**params))
+        conn.execute(by_metric.params(**params))
+        if frames:
+            conn.execute(clear_by_object.params(frames=frames))
+            conn.execute(by_object.params(frames=frames))
+    return res.rowcount
 
 
 def get_rated_frames_oldest(tenant_id: AnyStr) -> List[Dict]:
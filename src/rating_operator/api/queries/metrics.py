@@ -1,12 +1,21 @@
-from typing import AnyStr, Dict, List
+import datetime
+from typing import AnyStr, Dict, Iterator, List
 
+from rating_operator.api.cache import cached, single_flight
 from rating_operator.api.check import date_checker_start_end, multi_tenant
-from rating_operator.api.db import db
-from rating_operator.api.utils import process_query
+from rating_operator.api.check import period_hours, period_start
+from rating_operator.api.utils import iter_query, process_query
 from rating_operator.api.utils import process_query_get_count
 
 import sqlalchemy as sa
-from sqlalchemy.sql.expression import bindparam
+
+
+_TENANTS_QRY = sa.text("""
+    SELECT tenant_id
+    FROM namespaces
+    GROUP BY tenant_id
+    ORDER BY tenant_id
+""")
 
 
 def get_tenants() -> List[Dict]:
@@ -15,13 +24,15 @@ def get_tenants() -> List[Dict]:
 
     Return a list of dictionary containing the results.
     """
-    qry = sa.text("""
-        SELECT tenant_id
-        FROM namespaces
-        GROUP BY tenant_id
-        ORDER BY tenant_id
-    """)
-    return process_query(qry, {})
+    return process_query(_TENANTS_QRY, {})
+
+
+_TENANT_NAMESPACE_QRY = sa.text("""
+    SELECT namespace
+    FROM namespaces
+    WHERE tenant_id = :tenant
+    ORDER BY namespace
+""")
 
 
 def get_tenant_namespace(tenant: AnyStr) -> List[Dict]:
@@ -32,25 +43,37 @@ def get_tenant_namespace(tenant: AnyStr) -> List[Dict]:
 
     Return a list of dictionary containing the results.
     """
-    qry = sa.text("""
-        SELECT namespace
-        FROM namespaces
-        WHERE tenant_id = :tenant
-        ORDER BY namespace
-    """)
     params = {
         'tenant': tenant
     }
-    return process_query(qry, params)
+    return process_query(_TENANT_NAMESPACE_QRY, params)
+
+
+# The frames of a range begin before its end: bounding frame_begin on both sides,
+# along with frame_end, lets the index scans stop at the end of the range
+_METRIC_RATING_QRY = sa.text("""
+    SELECT  frame_begin,
+            count(*) as node_count,
+            :metric as metric,
+            sum(frame_price) as price
+    FROM frames
+    WHERE metric = :metric
+    AND frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end <= :end
+    AND namespace = ANY(:namespaces)
+    GROUP BY frame_begin
+    ORDER BY frame_begin
+""")
 
 
 @date_checker_start_end
 @multi_tenant
-def get_metric_rating(metric: AnyStr,
-                      start: AnyStr,
-                      end: AnyStr,
-                      tenant_id: AnyStr,
-                      namespaces: List[AnyStr]) -> List[Dict]:
+def iter_metric_rating(metric: AnyStr,
+                       start: AnyStr,
+                       end: AnyStr,
+                       tenant_id: AnyStr,
+                       namespaces: List[AnyStr]) -> Iterator[Dict]:
     """
     Get the rating value on a timeframe for a given metric.
 
@@ -60,22 +83,8 @@ def get_metric_rating(metric: AnyStr,
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
-    Return the results of the query as a list of dictionary.
+    Return a generator over the results of the query, as dictionaries.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                count(node) as node_count,
-                metric,
-                sum(frame_price) as price
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= :start
-        AND frame_end <= :end
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'metric': metric,
         'start': start,
@@ -83,9 +92,24 @@ def get_metric_rating(metric: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(_METRIC_RATING_QRY, params)
 
 
+# A single metric is selected, a plain aggregate replaces the grouping on it
+_METRIC_TOTAL_RATING_QRY = sa.text("""
+    SELECT sum(frame_price) as frame_price,
+           :metric as metric
+    FROM frames
+    WHERE metric = :metric
+    AND frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end <= :end
+    AND namespace = ANY(:namespaces)
+    HAVING count(*) > 0
+""")
+
+
+@single_flight
 @date_checker_start_end
 @multi_tenant
 def get_metric_total_rating(metric: AnyStr,
@@ -104,17 +128,6 @@ def get_metric_total_rating(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT sum(frame_price) as frame_price,
-                                   metric
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= :start
-        AND frame_end <= :end
-        AND namespace IN :namespaces
-        GROUP BY metric
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'metric': metric,
         'start': start,
@@ -122,9 +135,18 @@ def get_metric_total_rating(metric: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return process_query(_METRIC_TOTAL_RATING_QRY, params)
+
+
+_METRICS_QRY = sa.text("""
+    SELECT DISTINCT metric
+    FROM frames
+    WHERE namespace = ANY(:namespaces)
+    ORDER BY metric
+""")
 
 
+@cached(ttl=30)
 @multi_tenant
 def get_metrics(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     """
@@ -135,19 +157,42 @@ def get_metrics(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT metric
-        FROM frames
-        WHERE namespace IN :namespaces
-        GROUP BY metric
-        ORDER BY metric
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return process_query(_METRICS_QRY, params)
+
+
+# frame_status holds a row per rated metric and report, it is kept whole in the process
+_FRAME_STATUS_QRY = sa.text("""
+    SELECT report_name, metric, last_insert
+    FROM frame_status
+""")
+
+
+@cached(ttl=15, maxsize=1)
+def get_frame_status() -> List[Dict]:
+    """
+    Get the rating status of every metric.
+
+    Return the rows of frame_status as a list of dictionary.
+    """
+    return process_query(_FRAME_STATUS_QRY, {})
+
+
+def latest_insert(rows: List[Dict]) -> List[Dict]:
+    """
+    Keep the latest insertion time among frame_status rows.
+
+    :rows (List[Dict]) The rows of frame_status to consider.
+
+    Return the latest last_insert as a list of dictionary, empty if there are no rows.
+    """
+    if not rows:
+        return []
+    inserts = [row['last_insert'] for row in rows if row['last_insert'] is not None]
+    return [{'last_insert': max(inserts, default=None)}]
 
 
 def get_metric_report(metric: AnyStr, tenant_id: AnyStr) -> List[Dict]:
@@ -159,17 +204,10 @@ def get_metric_report(metric: AnyStr, tenant_id: AnyStr) -> List[Dict]:
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT report_name
-        FROM frame_status
-        WHERE metric = :metric
-    """)
-
-    params = {
-        'metric': metric,
-        'tenant_id': tenant_id
-    }
-    return process_query(qry, params)
+    return [
+        {'report_name': row['report_name']}
+        for row in get_frame_status() if row['metric'] == metric
+    ]
 
 
 def get_last_rated_date(metric: AnyStr, tenant_id: AnyStr) -> List[Dict]:
@@ -181,17 +219,7 @@ def get_last_rated_date(metric: AnyStr, tenant_id: AnyStr) -> List[Dict]:
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT last_insert
-        FROM frame_status
-        WHERE metric = :metric
-    """)
-
-    params = {
-        'metric': metric,
-        'tenant_id': tenant_id
-    }
-    return process_query(qry, params)
+    return latest_insert([row for row in get_frame_status() if row['metric'] == metric])
 
 
 def get_report_metric(report: AnyStr, tenant_id: AnyStr) -> List[Dict]:
@@ -203,16 +231,10 @@ def get_report_metric(report: AnyStr, tenant_id: AnyStr) -> List[Dict]:
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT metric
-        FROM frame_status
-        WHERE report_name = :report
-    """)
-
-    params = {
-        'report': report
-    }
-    return process_query(qry, params)
+    return [
+        {'metric': row['metric']}
+        for row in get_frame_status() if row['report_name'] == report
+    ]
 
 
 def get_last_rated_reports(report: AnyStr, tenant_id: AnyStr) -> List[Dict]:
@@ -224,24 +246,30 @@ def get_last_rated_reports(report: AnyStr, tenant_id: AnyStr) -> List[Dict]:
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT last_insert
-        FROM frame_status
-        WHERE report_name = :report
-    """)
+    return latest_insert(
+        [row for row in get_frame_status() if row['report_name'] == report])
 
-    params = {
-        'report': report
-    }
-    return process_query(qry, params)
+
+_METRIC_RATING_MAX_QRY = sa.text("""
+    SELECT  frame_begin,
+            ceil(max(frame_price)) as frame_price
+    FROM frames
+    WHERE frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end < :end
+    AND metric = :metric
+    AND namespace = ANY(:namespaces)
+    GROUP BY frame_begin
+    ORDER BY frame_begin
+""")
 
 
 @multi_tenant
-def get_metric_rating_max(metric: AnyStr,
-                          start: AnyStr,
-                          end: AnyStr,
-                          tenant_id: AnyStr,
-                          namespaces: List[AnyStr]) -> List[Dict]:
+def iter_metric_rating_max(metric: AnyStr,
+                           start: AnyStr,
+                           end: AnyStr,
+                           tenant_id: AnyStr,
+                           namespaces: List[AnyStr]) -> Iterator[Dict]:
     """
     Get the max value for the given period and metric.
 
@@ -251,20 +279,8 @@ def get_metric_rating_max(metric: AnyStr,
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
-    Return the results of the query as a list of dictionary.
+    Return a generator over the results of the query, as dictionaries.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                ceil(max(frame_price)) as frame_price
-        FROM frames
-        WHERE frame_begin >= :start
-        AND frame_end < :end
-        AND metric = :metric
-        AND namespace IN :namespaces
-        GROUP BY frame_begin
-        ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'metric': metric,
         'start': start,
@@ -272,7 +288,21 @@ def get_metric_rating_max(metric: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(_METRIC_RATING_MAX_QRY, params)
+
+
+_METRIC_INSTANCE_QRY = sa.text("""
+    SELECT  frame_begin,
+            ceil(max(frame_price)) as metric_value
+    FROM frames
+    WHERE frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end < :end
+    AND metric = :metric
+    AND namespace = ANY(:namespaces)
+    GROUP BY frame_begin
+    ORDER BY frame_begin
+""")
 
 
 @multi_tenant
@@ -292,18 +322,6 @@ def get_metric_instance(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text(f"""
-        SELECT  frame_begin,
-                ceil(max(frame_price)) as {metric}
-        FROM frames
-        WHERE frame_begin >= :start
-        AND frame_end < :end
-        AND metric = :metric
-        AND namespace IN :namespaces
-        GROUP BY frame_begin
-        ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'metric': metric,
         'start': start,
@@ -311,15 +329,34 @@ def get_metric_instance(metric: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    # The value column is named after the metric, outside of the SQL text
+    return [
+        {'frame_begin': row['frame_begin'], metric: row['metric_value']}
+        for row in process_query(_METRIC_INSTANCE_QRY, params)
+    ]
+
+
+_METRIC_RATIO_QRY = sa.text("""
+    SELECT  frame_begin,
+            sum(frame_price) / count(*) as ratio,
+            :metric as metric
+    FROM frames
+    WHERE metric = :metric
+    AND frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end <= :end
+    AND namespace = ANY(:namespaces)
+    GROUP BY frame_begin
+    ORDER BY frame_begin
+""")
 
 
 @multi_tenant
-def get_metric_ratio(metric: AnyStr,
-                     start: AnyStr,
-                     end: AnyStr,
-                     tenant_id: AnyStr,
-                     namespaces: List[AnyStr]) -> List[Dict]:
+def iter_metric_ratio(metric: AnyStr,
+                      start: AnyStr,
+                      end: AnyStr,
+                      tenant_id: AnyStr,
+                      namespaces: List[AnyStr]) -> Iterator[Dict]:
     """
     Get the ratio between nodes and price for the given metric.
 
@@ -329,21 +366,55 @@ def get_metric_ratio(metric: AnyStr,
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
-    Return the results of the query as a list of dictionary.
+    Return a generator over the results of the query, as dictionaries.
+    """
+    params = {
+        'metric': metric,
+        'start': start,
+        'end': end,
+        'tenant_id': tenant_id,
+        'namespaces': namespaces
+    }
+    return iter_query(_METRIC_RATIO_QRY, params)
+
+
+# Rating, ratio and max of a metric by frame, computed together in a single scan
+_METRIC_SUMMARY_QRY = sa.text("""
+    SELECT  frame_begin,
+            :metric as metric,
+            count(*) as node_count,
+            sum(frame_price) as price,
+            sum(frame_price) / count(*) as ratio,
+            ceil(max(frame_price)) as frame_price_max
+    FROM frames
+    WHERE metric = :metric
+    AND frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end <= :end
+    AND namespace = ANY(:namespaces)
+    GROUP BY frame_begin
+    ORDER BY frame_begin
+""")
+
+
+@date_checker_start_end
+@multi_tenant
+def iter_metric_summary(metric: AnyStr,
+                        start: AnyStr,
+                        end: AnyStr,
+                        tenant_id: AnyStr,
+                        namespaces: List[AnyStr]) -> Iterator[Dict]:
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                sum(frame_price) / count(node) as ratio,
-                metric
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= :start
-        AND frame_end <= :end
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
+    Get the rating, the ratio per node and the max price of a metric, by frame.
+
+    :metric (AnyStr) A string representing the metric.
+    :start (AnyStr) A timestamp, as a string, to represent the starting time.
+    :end (AnyStr)  A timestamp, as a string, to represent the ending time.
+    :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
+    Return a generator over the results of the query, as dictionaries.
+    """
     params = {
         'metric': metric,
         'start': start,
@@ -351,9 +422,43 @@ def get_metric_ratio(metric: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(_METRIC_SUMMARY_QRY, params)
+
+
+# The day, week and month variants of the queries below only differ by the bound values,
+# they aggregate to a single row and need neither GROUP BY nor ORDER BY
+_METRIC_PERIOD_RATING_QRY = sa.text("""
+    SELECT max(frame_price) * :hours AS frame_price
+    FROM frames
+    WHERE metric = :metric
+    AND frame_begin >= :since
+    AND namespace = ANY(:namespaces)
+""")
+
+
+def metric_period_rating(unit: AnyStr,
+                         metric: AnyStr,
+                         namespaces: List[AnyStr]) -> List[Dict]:
+    """
+    Get the price of a metric over the current day, week or month.
+
+    :unit (AnyStr) A string representing the period, either day, week or month.
+    :metric (AnyStr) A string representing the metric.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+
+    Return the results of the query as a list of dictionary.
+    """
+    now = datetime.datetime.utcnow()
+    params = {
+        'metric': metric,
+        'namespaces': namespaces,
+        'since': period_start(unit, now),
+        'hours': period_hours(unit, now)
+    }
+    return process_query(_METRIC_PERIOD_RATING_QRY, params)
 
 
+@cached(ttl=60)
 @multi_tenant
 def get_metric_daily_rating(metric: AnyStr,
                             tenant_id: AnyStr,
@@ -367,22 +472,10 @@ def get_metric_daily_rating(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT max(frame_price) * 24 AS frame_price
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= date_trunc('day', now())
-        AND namespace IN :namespaces
-    """).bindparams(bindparam('namespaces', expanding=True))
-
-    params = {
-        'metric': metric,
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
+    return metric_period_rating('day', metric=metric, namespaces=namespaces)
 
 
+@cached(ttl=60)
 @multi_tenant
 def get_metric_weekly_rating(metric: AnyStr,
                              tenant_id: AnyStr,
@@ -396,22 +489,10 @@ def get_metric_weekly_rating(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT  max(frame_price) * 24 * 7 AS frame_price
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= date_trunc('week', now())
-        AND namespace IN :namespaces
-    """).bindparams(bindparam('namespaces', expanding=True))
-
-    params = {
-        'metric': metric,
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
+    return metric_period_rating('week', metric=metric, namespaces=namespaces)
 
 
+@cached(ttl=60)
 @multi_tenant
 def get_metric_monthly_rating(metric: AnyStr,
                               tenant_id: AnyStr,
@@ -425,30 +506,30 @@ def get_metric_monthly_rating(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT  max(frame_price) * 24 *
-        (SELECT extract(days FROM
-         date_trunc('month', now()) + interval '1 month - 1 day'))
-        AS frame_price
-        FROM frames
-        WHERE metric = :metric
-        AND frame_begin >= date_trunc('month', now())
-        AND namespace IN :namespaces
-    """).bindparams(bindparam('namespaces', expanding=True))
+    return metric_period_rating('month', metric=metric, namespaces=namespaces)
 
-    params = {
-        'metric': metric,
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
+
+_METRICS_RATING_QRY = sa.text("""
+    SELECT  frame_begin,
+            sum(frame_price) as frame_price,
+            metric
+    FROM frames
+    WHERE frame_begin >= :start
+    AND frame_begin <= :end
+    AND frame_end < :end
+    AND namespace != 'unspecified'
+    AND pod != 'unspecified'
+    AND namespace = ANY(:namespaces)
+    GROUP BY metric, frame_begin
+    ORDER BY frame_begin, metric
+""")
 
 
 @multi_tenant
-def get_metrics_rating(start: AnyStr,
-                       end: AnyStr,
-                       tenant_id: AnyStr,
-                       namespaces: List[AnyStr]) -> List[Dict]:
+def iter_metrics_rating(start: AnyStr,
+                        end: AnyStr,
+                        tenant_id: AnyStr,
+                        namespaces: List[AnyStr]) -> Iterator[Dict]:
     """
     Get the rating for metrics.
 
@@ -457,31 +538,46 @@ def get_metrics_rating(start: AnyStr,
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
-    Return the results of the query as a list of dictionary.
+    Return a generator over the results of the query, as dictionaries.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                sum(frame_price) as frame_price,
-                metric
-        FROM frames
-        WHERE frame_begin >= :start
-        AND frame_end < :end
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
-
     params = {
         'start': start,
         'end': end,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(_METRICS_RATING_QRY, params)
+
+
+_METRICS_PERIOD_RATING_QRY = sa.text("""
+    SELECT  frame_begin,
+            sum(frame_price) as frame_price,
+            metric
+    FROM frames_by_metric
+    WHERE frame_begin >= :since
+    AND namespace = ANY(:namespaces)
+    GROUP BY metric, frame_begin
+    ORDER BY frame_begin, metric
+""")
+
 
+def metrics_period_rating(unit: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
+    """
+    Get the rating of metrics since the start of the current day, week or month.
+
+    :unit (AnyStr) A string representing the period, either day, week or month.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
 
+    Return the results of the query as a list of dictionary.
+    """
+    params = {
+        'namespaces': namespaces,
+        'since': period_start(unit)
+    }
+    return process_query(_METRICS_PERIOD_RATING_QRY, params)
+
+
+@cached(ttl=60)
 @multi_tenant
 def get_metrics_rating_daily(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     """
@@ -492,26 +588,10 @@ def get_metrics_rating_daily(tenant_id: AnyStr, namespaces: List[AnyStr]) -> Lis
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                sum(frame_price) as frame_price,
-                metric
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
-
-    params = {
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
+    return metrics_period_rating('day', namespaces=namespaces)
 
 
+@cached(ttl=60)
 @multi_tenant
 def get_metrics_rating_weekly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     """
@@ -522,26 +602,10 @@ def get_metrics_rating_weekly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> Li
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                sum(frame_price) as frame_price,
-                metric
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
-
-    params = {
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
+    return metrics_period_rating('week', namespaces=namespaces)
 
 
+@cached(ttl=60)
 @multi_tenant
 def get_metrics_rating_monthly(tenant_id: AnyStr,
                                namespaces: List[AnyStr]) -> List[Dict]:
@@ -553,26 +617,19 @@ def get_metrics_rating_monthly(tenant_id: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT  frame_begin,
-                sum(frame_price) as frame_price,
-                metric
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
-        GROUP BY frame_begin, metric
-        ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    return metrics_period_rating('month', namespaces=namespaces)
 
-    params = {
-        'tenant_id': tenant_id,
-        'namespaces': namespaces
-    }
-    return process_query(qry, params)
 
+_METRIC_TO_DATE_QRY = sa.text("""
+    SELECT max(frame_price) * :hours AS frame_price
+    FROM frames
+    WHERE frame_begin >= :month_start
+    AND metric = :metric
+    AND namespace = ANY(:namespaces)
+""")
 
+
+@cached(ttl=60)
 @multi_tenant
 def get_metric_to_date(metric: AnyStr,
                        tenant_id: AnyStr,
@@ -586,31 +643,25 @@ def get_metric_to_date(metric: AnyStr,
 
     Return the results of the query as a list of dictionary.
     """
-    qry = sa.text("""
-        SELECT max(frame_price) *
-               (SELECT
-                    (EXTRACT(EPOCH from now()) -
-                     EXTRACT(EPOCH from date_trunc('month', now()))) / 3600)
-        AS frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
-        AND metric = :metric
-        AND namespace IN :namespaces
-    """).bindparams(bindparam('namespaces', expanding=True))
-
+    now = datetime.datetime.utcnow()
+    month_start = period_start('month', now)
     params = {
         'tenant_id': tenant_id,
         'metric': metric,
-        'namespaces': namespaces
+        'namespaces': namespaces,
+        'month_start': month_start,
+        'hours': (now - month_start).total_seconds() / 3600
     }
-    return process_query(qry, params)
+    return process_query(_METRIC_TO_DATE_QRY, params)
+
+
+_STORE_TEMPLATE_CONF_QRY = sa.text("""
+    INSERT INTO template (id, t_name, t_group, t_query, t_var)
+    VALUES (:t_id, :t_name, :t_group, :t_query, :t_var)
+""")
 
 
 def store_template_conf(t_id, t_name, t_group, t_query, t_var):
-    qry = sa.text("""
-        INSERT INTO template (id, t_name, t_group, t_query, t_var)
-        VALUES (:t_id, :t_name, :t_group, :t_query, :t_var)
-    """)
     params = {
         't_id': t_id,
         't_name': t_name,
@@ -618,14 +669,16 @@ def store_template_conf(t_id, t_name, t_group, t_query, t_var):
         't_var': t_var,
         't_query': t_query
     }
-    return process_query_get_count(qry, params)
+    return process_query_get_count(_STORE_TEMPLATE_CONF_QRY, params)
+
+
+_STORE_METRIC_CONF_QRY = sa.text("""
+    INSERT INTO metric (id, m_name, timeframe, m_var, t_name)
+    VALUES (:m_id, :m_name, :timeframe, :m_var, :t_name)
+""")
 
 
 def store_metric_conf(m_id, m_name, timeframe, m_var, t_name):
-    qry = sa.text("""
-        INSERT INTO metric (id, m_name, timeframe, m_var, t_name)
-        VALUES (:m_id, :m_name, :timeframe, :m_var, :t_name)
-    """)
     params = {
         'm_id': m_id,
         'm_name': m_name,
@@ -633,66 +686,83 @@ def store_metric_conf(m_id, m_name, timeframe, m_var, t_name):
         'm_var': m_var,
         't_name': t_name
     }
-    return process_query_get_count(qry, params)
+    count = process_query_get_count(_STORE_METRIC_CONF_QRY, params)
+    get_metric_conf.cache.clear()
+    return count
+
+
+_LIST_METRIC_CONF_QRY = sa.text("""
+    SELECT m_name
+    FROM metric
+    GROUP BY m_name
+""")
 
 
 def list_metric_conf():
-    qry = sa.text("""
-        SELECT m_name
-        FROM metric
-        GROUP BY m_name
-    """)
-    return [dict(row) for row in db.engine.execute(qry)]
+    return process_query(_LIST_METRIC_CONF_QRY, {})
+
 
+_METRIC_CONF_QRY = sa.text("""
+    SELECT id, m_name, timeframe, m_var, t_name
+    FROM metric
+    WHERE m_name = :name
+""")
 
+
+@cached(ttl=30)
 def get_metric_conf(name):
-    qry = sa.text("""
-        SELECT *
-        FROM metric
-        WHERE m_name = :name
-    """)
-    return process_query(qry, {'name': name})
+    return process_query(_METRIC_CONF_QRY, {'name': name})
+
+
+_TEMPLATE_VARIABLES_QRY = sa.text("""
+    SELECT t_var
+    FROM template
+    WHERE t_name = :name
+""")
 
 
 def get_template_variables(name):
-    qry = sa.text("""
-        SELECT t_var
-        FROM template
-        WHERE t_name = :name
-    """)
-    return process_query(qry, {'name': name})
+    return process_query(_TEMPLATE_VARIABLES_QRY, {'name': name})
+
+
+_DELETE_METRIC_CONF_QRY = sa.text("""
+    DELETE FROM metric
+    WHERE m_name = :name
+""")
 
 
 def delete_metric_conf(name):
-    qry = sa.text("""
-        DELETE FROM metric
-        WHERE m_name = :name
-    """)
     params = {
         'name': name
     }
-    return process_query_get_count(qry, params)
+    count = process_query_get_count(_DELETE_METRIC_CONF_QRY, params)
+    get_metric_conf.cache.clear()
+    return count
+
+
+_DELETE_TEMPLATE_CONF_QRY = sa.text("""
+    DELETE FROM template
+    WHERE t_name = :name
+""")
 
 
 def delete_template_conf(name):
-    qry = sa.text("""
-        DELETE FROM template
-        WHERE t_name = :name
-    """)
     params = {
         'name': name
     }
-    return process_query_get_count(qry, params)
+    return process_query_get_count(_DELETE_TEMPLATE_CONF_QRY, params)
+
+
+_STORE_INSTANCE_CONF_QRY = sa.text("""
+    INSERT INTO instance (instance_name, instance_promql, start_time, end_time,
+                          instance_values)
+    VALUES (:instance_name, :instance_promql, :start_time, :end_time,
+            :instance_values)
+""")
 
 
 def store_instance_conf(instance_name, instance_promql, start_time, end_time,
                         instance_values):
-    qry = sa.text("""
-        INSERT INTO instance (instance_name, instance_promql, start_time, end_time,
-                              instance_values)
-        VALUES (:instance_name, :instance_promql, :start_time, :end_time,
-                :instance_values)
-    """)
     params = {
         'instance_name': instance_name,
         'instance_promql': instance_promql,
@@ -700,18 +770,19 @@ def store_instance_conf(instance_name, instance_promql, start_time, end_time,
         'end_time': end_time,
         'instance_values': instance_values
     }
-    return process_query_get_count(qry, params)
+    return process_query_get_count(_STORE_INSTANCE_CONF_QRY, params)
 
 
-def delete_instance_conf(instance_name, end_time):
-    qry = sa.text("""
-        UPDATE instance
-        SET end_time = :end_time
-        WHERE instance_name = :instance_name
-    """)
+_DELETE_INSTANCE_CONF_QRY = sa.text("""
+    UPDATE instance
+    SET end_time = :end_time
+    WHERE instance_name = :instance_name
+""")
 
+
+def delete_instance_conf(instance_name, end_time):
     params = {
         'end_time': end_time,
         'instance_name': instance_name
     }
-    return process_query_get_count(qry, params)
+    return process_query_get_count(_DELETE_INSTANCE_CONF_QRY, params)
@@ -1,43 +1,53 @@
-import random
-import string
-from typing import AnyStr, Dict, List
+import secrets
+from typing import AnyStr, Dict, Iterator, List, Tuple
 
 from flask import abort, jsonify, make_response
 
 from kubernetes import client
 from kubernetes.client.rest import ApiException
 
-from rating_operator.api.check import date_checker_start_end, multi_tenant
-from rating_operator.api.secret import get_client
-from rating_operator.api.utils import process_query, process_query_get_count
+from rating_operator.api.cache import cached
+from rating_operator.api.check import date_checker_start_end, multi_tenant, period_start
+from rating_operator.api.check import skip_empty_range
+from rating_operator.api.secret import get_core_v1_api
+from rating_operator.api.utils import iter_query, map_in_request, process_query, \
+    process_query_get_count, process_query_page
 
 import sqlalchemy as sa
-from sqlalchemy.sql.expression import bindparam
 
 
 def create_tenant_namespace(tenant: AnyStr, quantity: int):
     """
     Create namespaces for the tenant.
 
+    The namespaces are created concurrently.
+
     :tenant (AnyStr) A string to represent the tenant name, to annotate the namespaces.
     :quantity (int) A number of namespaces to create and assign to the tenant.
     """
-    api = client.CoreV1Api(get_client())
     labels = {
         'tenant': tenant
     }
+    namespaces = []
     for number in range(int(quantity)):
-        rd = ''.join(
-            [random.choice(string.ascii_letters + string.digits) for n in range(8)])
-        name = f'{tenant}-{number}-{rd}'.lower()
+        name = f'{tenant}-{number}-{secrets.token_hex(4)}'.lower()
         meta = client.V1ObjectMeta(labels=labels, name=name)
-        namespace = client.V1Namespace(metadata=meta)
-        try:
-            api.create_namespace(namespace)
-        except ApiException as exc:
-            if exc.status == 403:
-                abort(make_response(jsonify(msg=str(exc))), exc.status)
-            raise exc
+        namespaces.append(client.V1Namespace(metadata=meta))
+    map_in_request(create_namespace, namespaces)
+
+
+def create_namespace(namespace: client.V1Namespace):
+    """
+    Create a namespace.
+
+    :namespace (V1Namespace) The namespace to create.
+    """
+    try:
+        get_core_v1_api().create_namespace(namespace)
+    except ApiException as exc:
+        if exc.status == 403:
+            abort(make_response(jsonify(msg=str(exc))), exc.status)
+        raise exc
 
 
 def delete_namespace(namespace: AnyStr):
@@ -47,7 +57,7 @@ def delete_namespace(namespace: AnyStr):
     :namespace (AnyStr) A string to represent the namespace.
     """
     try:
-        client.CoreV1Api(get_client()).delete_namespace(namespace)
+        get_core_v1_api().delete_namespace(namespace)
     except ApiException as exc:
         if exc.status == 404:
             abort(make_response(jsonify(msg=str(exc))), exc.status)
@@ -61,7 +71,7 @@ def modify_namespace(tenant: AnyStr, namespace: AnyStr):
     :tenant (AnyStr) A string representing the tenant.
     :namespace (AnyStr) A string representing the namespace to assign to the tenant.
     """
-    api = client.CoreV1Api(get_client())
+    api = get_core_v1_api()
     labels = {
         'tenant': tenant
     }
@@ -110,6 +120,7 @@ def update_namespace(namespace: AnyStr, tenant_id: AnyStr) -> int:
     return process_query_get_count(qry, params)
 
 
+@cached(ttl=30)
 @multi_tenant
 def get_namespaces(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     """
@@ -123,9 +134,9 @@ def get_namespaces(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     qry = sa.text("""
         SELECT namespace, tenant_id
         FROM namespaces
-        WHERE namespace IN :namespaces
+        WHERE namespace = ANY(:namespaces)
         ORDER BY namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'tenant_id': tenant_id,
@@ -135,6 +146,7 @@ def get_namespaces(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
 
 
 @date_checker_start_end
+@skip_empty_range()
 @multi_tenant
 def get_namespace_rating(namespace: AnyStr,
                          start: AnyStr,
@@ -160,10 +172,10 @@ def get_namespace_rating(namespace: AnyStr,
         WHERE namespace = :namespace
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric
         ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'namespace': namespace,
@@ -177,10 +189,56 @@ def get_namespace_rating(namespace: AnyStr,
 
 @date_checker_start_end
 @multi_tenant
+def get_namespaces_rating_bulk(names: List[AnyStr],
+                               start: AnyStr,
+                               end: AnyStr,
+                               tenant_id: AnyStr,
+                               namespaces: List[AnyStr]) -> List[Dict]:
+    """
+    Get the rating of several namespaces, in a single query.
+
+    :names (List[AnyStr]) A list of the namespaces to rate.
+    :start (AnyStr) A timestamp, as a string, to represent the starting time.
+    :end (AnyStr)  A timestamp, as a string, to represent the ending time.
+    :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+
+    Return the results of the query as a list of dictionary.
+    """
+    qry = sa.text("""
+        SELECT  frame_begin,
+                sum(frame_price) as frame_price,
+                metric,
+                namespace
+        FROM frames
+        WHERE namespace = ANY(:names)
+        AND frame_begin >= :start
+        AND frame_end <= :end
+        AND namespace = ANY(:namespaces)
+        GROUP BY frame_begin, metric, namespace
+        ORDER BY namespace, frame_begin, metric
+    """)
+
+    params = {
+        'names': list(names),
+        'namespaces': namespaces,
+        'start': start,
+        'end': end,
+        'tenant_id': tenant_id
+    }
+    return process_query(qry, params)
+
+
+@cached(ttl=30)
+@date_checker_start_end
+@skip_empty_range(lambda: ([], 0))
+@multi_tenant
 def get_namespaces_rating(start: AnyStr,
                           end: AnyStr,
                           tenant_id: AnyStr,
-                          namespaces: List[AnyStr]) -> List[Dict]:
+                          namespaces: List[AnyStr],
+                          limit: int = None,
+                          offset: int = 0) -> Tuple[List[Dict], int]:
     """
     Get the rating by namespaces.
 
@@ -188,8 +246,51 @@ def get_namespaces_rating(start: AnyStr,
     :end (AnyStr)  A timestamp, as a string, to represent the ending time.
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+    :limit (int, optional) The maximum number of rows to return, all of them if None.
+    :offset (int, optional) The number of rows to skip.
 
-    Return the results of the query as a list of dictionary.
+    Return the page of results as a list of dictionary, and the total number of rows.
+    """
+    qry = sa.text("""
+        SELECT  frame_begin,
+                frame_price,
+                namespace,
+                count(*) OVER () AS total_count
+        FROM frames
+        WHERE frame_begin >= :start
+        AND frame_end <= :end
+        AND pod != 'unspecified'
+        AND namespace = ANY(:namespaces)
+        ORDER BY frame_begin, namespace, node, pod, metric
+        LIMIT :limit OFFSET :offset
+    """)
+
+    params = {
+        'start': start,
+        'end': end,
+        'tenant_id': tenant_id,
+        'namespaces': namespaces,
+        'limit': limit,
+        'offset': offset
+    }
+    return process_query_page(qry, params)
+
+
+@date_checker_start_end
+@multi_tenant
+def iter_namespaces_rating(start: AnyStr,
+                           end: AnyStr,
+                           tenant_id: AnyStr,
+                           namespaces: List[AnyStr]) -> Iterator[Dict]:
+    """
+    Get the rating by namespaces, fetched lazily.
+
+    :start (AnyStr) A timestamp, as a string, to represent the starting time.
+    :end (AnyStr)  A timestamp, as a string, to represent the ending time.
+    :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+
+    Return a generator over the results of the query, as dictionaries.
     """
     qry = sa.text("""
         SELECT  frame_begin,
@@ -199,9 +300,9 @@ def get_namespaces_rating(start: AnyStr,
         WHERE frame_begin >= :start
         AND frame_end <= :end
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         ORDER BY frame_begin, namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -209,7 +310,7 @@ def get_namespaces_rating(start: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(qry, params)
 
 
 @multi_tenant
@@ -227,16 +328,15 @@ def get_namespaces_rating_daily(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -260,17 +360,16 @@ def get_namespace_rating_daily(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND namespace = :namespace
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'namespace': namespace
@@ -295,17 +394,16 @@ def get_namespace_rating_weekly(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND namespace = :namespace
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'namespace': namespace
@@ -330,17 +428,16 @@ def get_namespace_rating_monthly(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND namespace = :namespace
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'namespace': namespace
@@ -363,16 +460,15 @@ def get_namespaces_rating_weekly(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price DESC
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -394,22 +490,22 @@ def get_namespaces_rating_monthly(tenant_id: AnyStr,
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 namespace
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, frame_price DESC
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
     return process_query(qry, params)
 
 
+@skip_empty_range()
 @multi_tenant
 def get_namespaces_metrics_rating(start: AnyStr,
                                   end: AnyStr,
@@ -435,10 +531,10 @@ def get_namespaces_metrics_rating(start: AnyStr,
         AND frame_end < :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric, namespace
         ORDER BY frame_begin, metric, namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -450,6 +546,7 @@ def get_namespaces_metrics_rating(start: AnyStr,
 
 
 @date_checker_start_end
+@skip_empty_range()
 @multi_tenant
 def get_namespace_total_rating(namespace: AnyStr,
                                start: AnyStr,
@@ -469,17 +566,18 @@ def get_namespace_total_rating(namespace: AnyStr,
     """
     qry = sa.text("""
         SELECT sum(frame_price) as frame_price,
-                                   namespace,
+                                   :namespace as namespace,
                                    node,
                                    pod
         FROM frames
         WHERE namespace = :namespace
         AND frame_begin >= :start
+        AND frame_begin <= :end
         AND frame_end <= :end
-        AND namespace IN :namespaces
-        GROUP BY namespace, node, pod
+        AND namespace = ANY(:namespaces)
+        GROUP BY node, pod
         ORDER BY node, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'namespace': namespace,
@@ -492,6 +590,7 @@ def get_namespace_total_rating(namespace: AnyStr,
 
 
 @date_checker_start_end
+@skip_empty_range()
 @multi_tenant
 def get_namespaces_total_rating(start: AnyStr,
                                 end: AnyStr,
@@ -512,11 +611,12 @@ def get_namespaces_total_rating(start: AnyStr,
                                     namespace
         FROM frames
         WHERE frame_begin >= :start
+        AND frame_begin <= :end
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY namespace
         ORDER BY namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -528,6 +628,7 @@ def get_namespaces_total_rating(start: AnyStr,
 
 
 @date_checker_start_end
+@skip_empty_range()
 @multi_tenant
 def get_namespace_metric_rating(namespace: AnyStr,
                                 metric: AnyStr,
@@ -556,10 +657,10 @@ def get_namespace_metric_rating(namespace: AnyStr,
         AND metric = :metric
         AND frame_begin >= :start
         AND frame_end < :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'namespace': namespace,
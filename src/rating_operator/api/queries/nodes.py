@@ -1,12 +1,13 @@
-from typing import AnyStr, Dict, List
+from typing import AnyStr, Dict, Iterator, List, Tuple
 
-from rating_operator.api.check import date_checker_start_end, multi_tenant
-from rating_operator.api.utils import process_query
+from rating_operator.api.cache import cached
+from rating_operator.api.check import date_checker_start_end, multi_tenant, period_start
+from rating_operator.api.utils import iter_query, process_query, process_query_page
 
 import sqlalchemy as sa
-from sqlalchemy.sql.expression import bindparam
 
 
+@cached(ttl=30)
 @multi_tenant
 def get_nodes(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     """
@@ -20,10 +21,10 @@ def get_nodes(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[Dict]:
     qry = sa.text("""
         SELECT node
         FROM frames
-        WHERE namespace IN :namespaces
+        WHERE namespace = ANY(:namespaces)
         GROUP BY node
         ORDER BY node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'tenant_id': tenant_id,
@@ -58,10 +59,10 @@ def get_nodes_metrics_rating(start: AnyStr,
         AND frame_end < :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric, node
         ORDER BY frame_begin, metric, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -72,12 +73,15 @@ def get_nodes_metrics_rating(start: AnyStr,
     return process_query(qry, params)
 
 
+@cached(ttl=30)
 @date_checker_start_end
 @multi_tenant
 def get_nodes_rating(start: AnyStr,
                      end: AnyStr,
                      tenant_id: AnyStr,
-                     namespaces: List[AnyStr]) -> List[Dict]:
+                     namespaces: List[AnyStr],
+                     limit: int = None,
+                     offset: int = 0) -> Tuple[List[Dict], int]:
     """
     Get the rating by node.
 
@@ -85,8 +89,53 @@ def get_nodes_rating(start: AnyStr,
     :end (AnyStr)  A timestamp, as a string, to represent the ending time.
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+    :limit (int, optional) The maximum number of rows to return, all of them if None.
+    :offset (int, optional) The number of rows to skip.
 
-    Return the results of the query as a list of dictionary.
+    Return the page of results as a list of dictionary, and the total number of rows.
+    """
+    qry = sa.text("""
+        SELECT  frame_begin,
+                sum(frame_price) as frame_price,
+                node,
+                count(*) OVER () AS total_count
+        FROM frames
+        WHERE frame_begin >= :start
+        AND frame_end <= :end
+        AND namespace != 'unspecified'
+        AND pod != 'unspecified'
+        AND namespace = ANY(:namespaces)
+        GROUP BY frame_begin, node
+        ORDER BY frame_begin, node
+        LIMIT :limit OFFSET :offset
+    """)
+
+    params = {
+        'start': start,
+        'end': end,
+        'tenant_id': tenant_id,
+        'namespaces': namespaces,
+        'limit': limit,
+        'offset': offset
+    }
+    return process_query_page(qry, params)
+
+
+@date_checker_start_end
+@multi_tenant
+def iter_nodes_rating(start: AnyStr,
+                      end: AnyStr,
+                      tenant_id: AnyStr,
+                      namespaces: List[AnyStr]) -> Iterator[Dict]:
+    """
+    Get the rating by node, fetched lazily.
+
+    :start (AnyStr) A timestamp, as a string, to represent the starting time.
+    :end (AnyStr)  A timestamp, as a string, to represent the ending time.
+    :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+
+    Return a generator over the results of the query, as dictionaries.
     """
     qry = sa.text("""
         SELECT  frame_begin,
@@ -97,10 +146,10 @@ def get_nodes_rating(start: AnyStr,
         AND frame_end <= :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -108,7 +157,7 @@ def get_nodes_rating(start: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(qry, params)
 
 
 @multi_tenant
@@ -125,16 +174,15 @@ def get_nodes_rating_daily(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 node
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -157,17 +205,16 @@ def get_node_rating_daily(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND node = :node
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'node': node
@@ -189,16 +236,15 @@ def get_nodes_rating_weekly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 node
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -221,17 +267,16 @@ def get_node_rating_weekly(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND node = :node
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'node': node
@@ -253,16 +298,15 @@ def get_nodes_rating_monthly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> Lis
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 node
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -285,17 +329,16 @@ def get_node_rating_monthly(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND node = :node
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node
         ORDER BY frame_begin, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'node': node
@@ -325,10 +368,10 @@ def get_nodes_total_rating(start: AnyStr,
         FROM frames
         WHERE frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY node
         ORDER BY node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -365,10 +408,10 @@ def get_node_namespaces_rating(node: AnyStr,
         WHERE frame_begin >= :start
         AND frame_end < :end
         AND node = :node
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, namespace
         ORDER BY frame_begin, namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -410,10 +453,10 @@ def get_node_namespace_rating(node: AnyStr,
         AND frame_end <= :end
         AND node = :node
         AND namespace = :namespace
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, node, namespace
         ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -455,10 +498,10 @@ def get_node_namespace_total_rating(node: AnyStr,
         AND frame_end <= :end
         AND node = :node
         AND namespace = :namespace
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY node, namespace
         ORDER BY namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -497,10 +540,10 @@ def get_node_rating(node: AnyStr,
         WHERE node = :node
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric
         ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -539,10 +582,10 @@ def get_node_total_rating(node: AnyStr,
         WHERE node = :node
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY namespace, node, pod
         ORDER BY namespace, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -586,9 +629,9 @@ def get_node_metric_rating(node: AnyStr,
         and metric = :metric
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         ORDER BY frame_begin, namespace, pod, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -631,10 +674,10 @@ def get_node_metric_total_rating(node: AnyStr,
         AND metric = :metric
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY metric, namespace, pod
         ORDER BY namespace, pod, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'node': node,
@@ -673,10 +716,10 @@ def get_nodes_metric_rating(metric: AnyStr,
         WHERE metric = :metric
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric, node
         ORDER BY frame_begin, metric, node
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'metric': metric,
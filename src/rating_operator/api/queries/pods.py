@@ -1,12 +1,13 @@
-from typing import AnyStr, Dict, List
+from typing import AnyStr, Dict, Iterator, List, Tuple
 
-from rating_operator.api.check import date_checker_start_end, multi_tenant
-from rating_operator.api.utils import process_query
+from rating_operator.api.cache import cached
+from rating_operator.api.check import date_checker_start_end, multi_tenant, period_start
+from rating_operator.api.utils import iter_query, process_query, process_query_page
 
 import sqlalchemy as sa
-from sqlalchemy.sql.expression import bindparam
 
 
+@cached(ttl=30)
 @multi_tenant
 def get_pods(start: AnyStr,
              end: AnyStr,
@@ -27,10 +28,10 @@ def get_pods(start: AnyStr,
         FROM frames
         WHERE frame_begin >= :start
         AND frame_end < :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY pod
         ORDER BY pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -45,7 +46,9 @@ def get_pods(start: AnyStr,
 def get_pods_metrics_rating(start: AnyStr,
                             end: AnyStr,
                             tenant_id: AnyStr,
-                            namespaces: List[AnyStr]) -> List[Dict]:
+                            namespaces: List[AnyStr],
+                            limit: int = None,
+                            offset: int = 0) -> Tuple[List[Dict], int]:
     """
     Get the rating by pods and namespace.
 
@@ -53,39 +56,48 @@ def get_pods_metrics_rating(start: AnyStr,
     :end (AnyStr)  A timestamp, as a string, to represent the ending time.
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+    :limit (int, optional) The maximum number of rows to return, all of them if None.
+    :offset (int, optional) The number of rows to skip.
 
-    Return the results of the query as a list of dictionary.
+    Return the page of results as a list of dictionary, and the total number of rows.
     """
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 pod,
-                metric
+                metric,
+                count(*) OVER () AS total_count
         FROM frames
         WHERE frame_begin >= :start
         AND frame_end < :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric, pod
         ORDER BY frame_begin, metric, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+        LIMIT :limit OFFSET :offset
+    """)
 
     params = {
         'start': start,
         'end': end,
         'tenant_id': tenant_id,
-        'namespaces': namespaces
+        'namespaces': namespaces,
+        'limit': limit,
+        'offset': offset
     }
-    return process_query(qry, params)
+    return process_query_page(qry, params)
 
 
+@cached(ttl=30)
 @date_checker_start_end
 @multi_tenant
 def get_pods_rating(start: AnyStr,
                     end: AnyStr,
                     tenant_id: AnyStr,
-                    namespaces: List[AnyStr]) -> List[Dict]:
+                    namespaces: List[AnyStr],
+                    limit: int = None,
+                    offset: int = 0) -> Tuple[List[Dict], int]:
     """
     Get the rating by pods.
 
@@ -93,8 +105,56 @@ def get_pods_rating(start: AnyStr,
     :end (AnyStr)  A timestamp, as a string, to represent the ending time.
     :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
     :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+    :limit (int, optional) The maximum number of rows to return, all of them if None.
+    :offset (int, optional) The number of rows to skip.
 
-    Return the results of the query as a list of dictionary.
+    Return the page of results as a list of dictionary, and the total number of rows.
+    """
+    qry = sa.text("""
+        SELECT  frame_begin,
+                frame_end,
+                frame_price,
+                metric,
+                namespace,
+                node,
+                pod,
+                count(*) OVER () AS total_count
+        FROM frames
+        WHERE frame_begin >= :start
+        AND frame_end <= :end
+        AND namespace != 'unspecified'
+        AND pod != 'unspecified'
+        AND namespace = ANY(:namespaces)
+        ORDER BY frame_begin, metric, namespace, node, pod
+        LIMIT :limit OFFSET :offset
+    """)
+
+    params = {
+        'start': start,
+        'end': end,
+        'tenant_id': tenant_id,
+        'namespaces': namespaces,
+        'limit': limit,
+        'offset': offset
+    }
+    return process_query_page(qry, params)
+
+
+@date_checker_start_end
+@multi_tenant
+def iter_pods_rating(start: AnyStr,
+                     end: AnyStr,
+                     tenant_id: AnyStr,
+                     namespaces: List[AnyStr]) -> Iterator[Dict]:
+    """
+    Get the rating by pods, fetched lazily.
+
+    :start (AnyStr) A timestamp, as a string, to represent the starting time.
+    :end (AnyStr)  A timestamp, as a string, to represent the ending time.
+    :tenant_id (AnyStr) A string representing the tenant, only used by decorators.
+    :namespaces (List[AnyStr]) A list of namespaces accessible by the tenant.
+
+    Return a generator over the results of the query, as dictionaries.
     """
     qry = sa.text("""
         SELECT  frame_begin,
@@ -109,9 +169,9 @@ def get_pods_rating(start: AnyStr,
         AND frame_end <= :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         ORDER BY frame_begin, metric
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -119,7 +179,7 @@ def get_pods_rating(start: AnyStr,
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
-    return process_query(qry, params)
+    return iter_query(qry, params)
 
 
 @multi_tenant
@@ -136,16 +196,15 @@ def get_pods_rating_daily(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[D
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 pod
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -168,17 +227,16 @@ def get_pod_rating_daily(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('day', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND pod = :pod
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('day'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'pod': pod
@@ -200,16 +258,15 @@ def get_pods_rating_weekly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List[
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 pod
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -232,17 +289,16 @@ def get_pod_rating_weekly(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('week', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND pod = :pod
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('week'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'pod': pod
@@ -264,16 +320,15 @@ def get_pods_rating_monthly(tenant_id: AnyStr, namespaces: List[AnyStr]) -> List
         SELECT  frame_begin,
                 sum(frame_price) as frame_price,
                 pod
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        FROM frames_by_object
+        WHERE frame_begin >= :since
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces
     }
@@ -296,17 +351,16 @@ def get_pod_rating_monthly(tenant_id: AnyStr,
     qry = sa.text("""
         SELECT  frame_begin,
                 sum(frame_price) as frame_price
-        FROM frames
-        WHERE frame_begin >= date_trunc('month', now())
+        FROM frames_by_object
+        WHERE frame_begin >= :since
         AND pod = :pod
-        AND namespace != 'unspecified'
-        AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
+        'since': period_start('month'),
         'tenant_id': tenant_id,
         'namespaces': namespaces,
         'pod': pod
@@ -336,10 +390,10 @@ def get_pods_total_rating(start: AnyStr,
         FROM frames
         WHERE frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY pod
         ORDER BY pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -376,10 +430,10 @@ def get_pod_total_rating(pod: AnyStr,
         WHERE pod = :pod
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY namespace, node, pod
         ORDER BY namespace, node, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -416,9 +470,9 @@ def get_pod_namespace(pod: AnyStr,
         WHERE pod = :pod
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY pod, namespace
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -455,10 +509,10 @@ def get_pod_node(pod: AnyStr,
         WHERE pod = :pod
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY pod, node
         ORDER BY pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -497,10 +551,10 @@ def get_pod_rating(pod: AnyStr,
         WHERE pod = :pod
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, metric, pod
         ORDER BY frame_begin, metric, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -542,9 +596,9 @@ def get_pod_metric_rating(pod: AnyStr,
         AND metric = :metric
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         ORDER BY frame_begin
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -584,9 +638,9 @@ def get_pod_metric_total_rating(pod: AnyStr,
         AND metric = :metric
         AND frame_begin >= :start
         AND frame_end <= :end
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'pod': pod,
@@ -617,8 +671,8 @@ def get_pod_lifetime(pod: AnyStr,
                 max(frame_end) as end
         FROM frames
         WHERE pod = :pod
-        AND namespace IN :namespaces
-    """).bindparams(bindparam('namespaces', expanding=True))
+        AND namespace = ANY(:namespaces)
+    """)
 
     params = {
         'pod': pod,
@@ -652,10 +706,10 @@ def get_by_pod_rating(start: AnyStr,
         AND frame_end < :end
         AND namespace != 'unspecified'
         AND pod != 'unspecified'
-        AND namespace IN :namespaces
+        AND namespace = ANY(:namespaces)
         GROUP BY frame_begin, pod
         ORDER BY frame_begin, pod
-    """).bindparams(bindparam('namespaces', expanding=True))
+    """)
 
     params = {
         'start': start,
@@ -1,6 +1,6 @@
 import os
 from base64 import b64decode
-from functools import wraps
+from functools import lru_cache, wraps
 from typing import Callable
 
 from flask import request
@@ -8,9 +8,20 @@ from flask import request
 from kubernetes import client, config
 from kubernetes.client.rest import ApiException
 
+from rating_operator.api.cache import TTLCache
 from rating_operator.api.config import envvar
 
 
+# Kubernetes API objects shared between requests, rebuilt to pick up rotated tokens
+_k8s_apis = TTLCache(ttl=600, maxsize=8)
+
+# Size of the apiserver connection pool, shared by the threads of the server
+KUBERNETES_POOL_SIZE = int(os.environ.get('KUBERNETES_POOL_SIZE', 32))
+
+# Number of apiserver calls a request makes at once, when acting on several namespaces
+KUBERNETES_CONCURRENCY = int(os.environ.get('KUBERNETES_CONCURRENCY', 16))
+
+
 def authenticated_client():
     """Generate an authenticated Kubernetes client."""
     configuration = client.Configuration()
@@ -18,14 +29,57 @@ def authenticated_client():
     token = open('/var/run/secrets/kubernetes.io/serviceaccount/token', 'r').read()
     configuration.api_key['authorization'] = f'Bearer {token}'
     configuration.ssl_ca_cert = '/var/run/secrets/kubernetes.io/serviceaccount/ca.crt'
+    configuration.connection_pool_maxsize = KUBERNETES_POOL_SIZE
     return client.ApiClient(configuration=configuration)
 
 
-def get_client():
-    """Generate a Kubernetes client, with authentication if configured this way."""
-    if os.environ.get('AUTH', 'false') == 'false':
-        return client.ApiClient()
-    return authenticated_client()
+@lru_cache(maxsize=None)
+def load_incluster_config():
+    """Load the in-cluster Kubernetes configuration, once per process."""
+    config.load_incluster_config()
+
+
+def get_client() -> client.ApiClient:
+    """
+    Get a Kubernetes client, with authentication if configured this way.
+
+    The client is shared between requests, so are its kept-alive connections.
+
+    Return the Kubernetes client
+    """
+    api_client = _k8s_apis.get('api_client')
+    if api_client is None:
+        if os.environ.get('AUTH', 'false') == 'false':
+            configuration = client.Configuration.get_default_copy()
+            configuration.connection_pool_maxsize = KUBERNETES_POOL_SIZE
+            api_client = client.ApiClient(configuration=configuration)
+        else:
+            api_client = authenticated_client()
+        _k8s_apis.set('api_client', api_client)
+    return api_client
+
+
+def get_custom_objects_api() -> client.CustomObjectsApi:
+    """Return a Kubernetes CustomObjectsApi, shared between requests."""
+    api = _k8s_apis.get('custom_objects')
+    if api is None:
+        api = client.CustomObjectsApi(get_client())
+        _k8s_apis.set('custom_objects', api)
+    return api
+
+
+def get_core_v1_api() -> client.CoreV1Api:
+    """Return a Kubernetes CoreV1Api, shared between requests."""
+    api = _k8s_apis.get('core_v1')
+    if api is None:
+        api = client.CoreV1Api(get_client())
+        _k8s_apis.set('core_v1', api)
+    return api
+
+
+def reset_k8s_client():
+    """Drop the shared Kubernetes API objects, the next call rebuilds them."""
+    _k8s_apis.clear()
 
 
 def authenticated_request():
@@ -86,8 +140,8 @@ def require_admin(func: Callable) -> Callable:
 
 def register_admin_key():
     """Register the administrator key from the environment."""
-    config.load_incluster_config()
-    api = client.CoreV1Api(get_client())
+    load_incluster_config()
+    api = get_core_v1_api()
     namespace = envvar('RATING_NAMESPACE')
     secret_name = f'{namespace}-admin'
     try:
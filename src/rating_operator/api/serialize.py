@@ -0,0 +1,96 @@
+import datetime
+import decimal
+import uuid
+from typing import Dict, Iterable, List
+
+from flask import current_app, stream_with_context
+from flask.wrappers import Response
+
+import orjson
+
+from werkzeug.http import http_date
+
+
+def default(obj: object) -> object:
+    """
+    Convert the objects orjson cannot serialize natively.
+
+    Dates keep the format of Flask JSON encoder, that consumers already parse.
+
+    :obj (object) The object to convert
+
+    Return a serializable representation of the object
+    """
+    if isinstance(obj, datetime.date):
+        return http_date(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(content: object) -> bytes:
+    """
+    Serialize the content to JSON, using orjson.
+
+    :content (object) The object to serialize
+
+    Return the JSON document, as bytes
+    """
+    return orjson.dumps(
+        content,
+        default=default,
+        option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def fast_jsonify(content: object) -> Response:
+    """
+    Serialize the content to a JSON response, using orjson.
+
+    :content (object) The object to serialize
+
+    Return the JSON response.
+    """
+    return current_app.response_class(dumps(content), mimetype='application/json')
+
+
+def stream_jsonify(rows: Iterable[Dict], batch_size: int = 500) -> Response:
+    """
+    Stream rows to a JSON response, shaped as {"results": [...], "total": ...}.
+
+    Rows are serialized and sent by batches, as they are produced.
+
+    :rows (Iterable[Dict]) The rows to serialize, usually a lazy query result
+    :batch_size (int) The number of rows sent in each chunk
+
+    Return the streamed JSON response.
+    """
+    def generate():
+        total = 0
+        batch = [b'{"results":[']
+        for row in rows:
+            if total:
+                batch.append(b',')
+            batch.append(dumps(row))
+            total += 1
+            if total % batch_size == 0:
+                yield b''.join(batch)
+                batch = []
+        batch.append(b'],"total":%d}' % total)
+        yield b''.join(batch)
+    return current_app.response_class(
+        stream_with_context(generate()), mimetype='application/json')
+
+
+def respond(rows: List[Dict], total: int = None) -> Dict:
+    """
+    Build the payload of a listing endpoint.
+
+    :rows (List[Dict]) The rows to return
+    :total (int, optional) The number of rows matching the query, if paginated
+
+    Return a dictionary holding the results and their total
+    """
+    return {
+        'total': len(rows) if total is None else total,
+        'results': rows
+    }
@@ -1,20 +1,165 @@
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
 
+from flask import copy_current_request_context, current_app, g, has_app_context
+
+from rating_operator.api.cache import TTLCache, make_key, since_cleared
 from rating_operator.api.db import db, presto_db
+from rating_operator.api.secret import KUBERNETES_CONCURRENCY
 
+import sqlalchemy as sa
+from sqlalchemy.engine import CursorResult, Engine
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.sql.elements import TextClause
 
 
+# The replication lag is measured at most once every few seconds
+_replica_lag = TTLCache(ttl=5, maxsize=1)
+
+_REPLICA_LAG_QRY = sa.text("""
+    SELECT coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0)
+""")
+
+
+def request_cached(func: Callable) -> Callable:
+    """
+    Memoize the decorated query for the duration of the current request.
+
+    Results are kept in the application context, dropped along with it once the
+    request is over, so repeated calls of a request share a single round-trip.
+
+    :func (Callable) The decorated function
+
+    Return a wrapper returning the memoized results
+    """
+    @wraps(func)
+    def wrapper(*args: Tuple, **kwargs: Dict) -> Any:
+        """
+        Return the result memoized in the request, or call the decorated function.
+
+        :args (Tuple) A tuple containing the positional parameters
+        :kwargs (Dict) A dictionary containing the keyword parameters
+
+        Return the result of the decorated function
+        """
+        if not has_app_context():
+            return func(*args, **kwargs)
+        results = g.setdefault('query_results', {})
+        key = (func.__qualname__, args, make_key(kwargs))
+        if key not in results:
+            results[key] = func(*args, **kwargs)
+        return results[key]
+    return wrapper
+
+
+def replica_lag(engine: Engine) -> float:
+    """
+    Get the replication lag of the replica.
+
+    :engine (Engine) The engine of the replica
+
+    Return the time since the last replayed transaction in seconds, infinite if
+    the replica cannot be reached
+    """
+    lag = _replica_lag.get('lag')
+    if lag is None:
+        try:
+            lag = float(engine.execute(_REPLICA_LAG_QRY).scalar())
+        except OperationalError:
+            lag = float('inf')
+        _replica_lag.set('lag', lag)
+    return lag
+
+
+def read_engine() -> Engine:
+    """
+    Get the engine serving the read-only queries.
+
+    The primary takes over while the replica lags too far behind, and right after
+    a write, until the replica has had time to replay it: a stale result would
+    otherwise be cached under the new data revision.
+
+    Return the engine of the replica if one is configured, the primary otherwise
+    """
+    if 'replica' in (current_app.config.get('SQLALCHEMY_BINDS') or {}):
+        max_lag = current_app.config['POSTGRES_REPLICA_MAX_LAG']
+        engine = db.get_engine(bind='replica')
+        if since_cleared() > max_lag and replica_lag(engine) <= max_lag:
+            return engine
+    return db.engine
+
+
+def rows_as_dicts(result: CursorResult) -> List[Dict]:
+    """
+    Convert the rows of a result to dictionaries.
+
+    The column names are read once, instead of going through the mapping of each row.
+
+    :result (CursorResult) The result of an executed query
+
+    Return the rows as a list of dictionary
+    """
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
 def process_query(qry: TextClause, params: Dict) -> List[Dict]:
     """
-    Execute the given query with parameters.
+    Execute the given read-only query with parameters, on the replica if configured.
 
     :qry (TextClause) A SQL query
     :params (Dict) A dictionary containing any parameters to be interpolated in the query
 
     Return the result of the query as a list of dictionary
     """
-    return [dict(row) for row in db.engine.execute(qry.params(**params))]
+    return rows_as_dicts(read_engine().execute(qry, params))
+
+
+def iter_query(qry: TextClause, params: Dict) -> Iterator[Dict]:
+    """
+    Execute the given query with parameters, fetching the results lazily.
+
+    Rows are read through a server-side cursor, so the whole result set is never held.
+
+    :qry (TextClause) A SQL query
+    :params (Dict) A dictionary containing any parameters to be interpolated in the query
+
+    Return a generator over the results of the query, as dictionaries
+    """
+    with read_engine().connect() as conn:
+        result = conn.execution_options(stream_results=True, max_row_buffer=1000).execute(
+            qry, params)
+        keys = tuple(result.keys())
+        for row in result:
+            yield dict(zip(keys, row))
+
+
+def process_query_page(qry: TextClause, params: Dict) -> Tuple[List[Dict], int]:
+    """
+    Execute the given paginated query with parameters.
+
+    The query is expected to select the number of matching rows as total_count,
+    computed before pagination, with count(*) OVER (). A page past the last row
+    has none to carry it, the rows are then counted by a separate query.
+
+    :qry (TextClause) A SQL query
+    :params (Dict) A dictionary containing any parameters to be interpolated in the query
+
+    Return the page of results as a list of dictionary, and the total number of rows
+    """
+    rows = process_query(qry, params)
+    if rows:
+        total = rows[0]['total_count']
+    elif params.get('offset'):
+        count = sa.text(f'SELECT count(*) FROM ({qry.text}) AS page')
+        total = read_engine().execute(
+            count, {**params, 'limit': None, 'offset': 0}).scalar()
+    else:
+        total = 0
+    for row in rows:
+        del row['total_count']
+    return rows, total
 
 
 def process_query_get_count(qry: TextClause, params: Dict) -> int:
@@ -27,7 +172,7 @@ def process_query_get_count(qry: TextClause, params: Dict) -> int:
     Return the number of row affected by the query
     """
     with db.engine.begin() as conn:
-        res = conn.execute(qry.params(**params))
+        res = conn.execute(qry, params)
     return res.rowcount
 
 
@@ -40,4 +185,23 @@ def presto_process_query(qry: TextClause, params: Dict) -> List[Dict]:
 
     Return the result of the query as a list of dictionary
     """
-    return [dict(row) for row in presto_db.execute(qry.params(**params))]
+    return rows_as_dicts(presto_db.execute(qry, params))
+
+
+def map_in_request(func: Callable, *iterables: Iterable) -> List:
+    """
+    Call a function over the iterables concurrently, in copies of the request context.
+
+    Meant for the Kubernetes calls on several namespaces, which wait on the apiserver.
+
+    :func (Callable) The function to call
+    :iterables (Iterable) The iterables providing the positional arguments, as for map
+
+    Return the results, in order, raising the first error met
+    """
+    with ThreadPoolExecutor(max_workers=KUBERNETES_CONCURRENCY) as executor:
+        futures = [
+            executor.submit(copy_current_request_context(func), *args)
+            for args in zip(*iterables)
+        ]
+    return [future.result() for future in futures]
@@ -57,6 +57,29 @@ def write_rated_frames(frames: List[List]) -> object:
         FROM frames_copy
         ON CONFLICT ON CONSTRAINT frames_pkey DO NOTHING
     """
+    # Only the frames touched by this batch are summed again
+    updating_frames_by_object = """
+        INSERT INTO frames_by_object
+        SELECT frame_begin, namespace, node, pod, sum(frame_price)
+        FROM frames
+        WHERE frame_begin IN (SELECT DISTINCT frame_begin FROM frames_copy)
+        AND namespace != 'unspecified'
+        AND pod != 'unspecified'
+        GROUP BY frame_begin, namespace, node, pod
+        ON CONFLICT ON CONSTRAINT frames_by_object_pkey
+        DO UPDATE SET frame_price = EXCLUDED.frame_price
+    """
+    updating_frames_by_metric = """
+        INSERT INTO frames_by_metric
+        SELECT frame_begin, metric, namespace, sum(frame_price)
+        FROM frames
+        WHERE frame_begin IN (SELECT DISTINCT frame_begin FROM frames_copy)
+        AND namespace != 'unspecified'
+        AND pod != 'unspecified'
+        GROUP BY frame_begin, metric, namespace
+        ON CONFLICT ON CONSTRAINT frames_by_metric_pkey
+        DO UPDATE SET frame_price = EXCLUDED.frame_price
+    """
     res = db.engine.execute('TRUNCATE frames_copy')
     connection = db.engine.raw_connection()
     with tempfile.NamedTemporaryFile(mode='w+',
@@ -72,6 +95,10 @@ def write_rated_frames(frames: List[List]) -> object:
                 connection)
             logging.info('merging frames_copy into frames..')
             cursor.execute(merging_frames)
+            logging.info('updating frames_by_object..')
+            cursor.execute(updating_frames_by_object)
+            logging.info('updating frames_by_metric..')
+            cursor.execute(updating_frames_by_metric)
             connection.commit()
 
     connection.close()
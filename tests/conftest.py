@@ -0,0 +1,9 @@
+import os
+import tempfile
+
+# The configuration is read when the modules are imported
+os.environ.setdefault('POSTGRES_DATABASE_URI', 'postgresql://rating@localhost/rating')
+os.environ.setdefault('PRESTO_DATABASE_URI', 'presto://localhost:8080/hive/default')
+os.environ.setdefault('RATING_RATES_DIR', tempfile.mkdtemp())
+os.environ.setdefault('RATING_NAMESPACE', 'rating')
+os.environ.setdefault('AUTH_METHOD', 'local')
@@ -0,0 +1,115 @@
+import threading
+import time
+import unittest
+
+from rating_operator.api.cache import TTLCache, cached, clear_caches, data_revision
+from rating_operator.api.cache import since_cleared, single_flight
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_cache_get_set(self):
+        cache = TTLCache(ttl=30)
+        cache.set('key', 'value')
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertIsNone(cache.get('missing'))
+
+    def test_cache_expiration(self):
+        cache = TTLCache(ttl=0.01)
+        cache.set('key', 'value')
+        time.sleep(0.02)
+        self.assertEqual(cache.get('key', 'expired'), 'expired')
+
+    def test_cache_maxsize(self):
+        cache = TTLCache(ttl=30, maxsize=2)
+        for key in range(3):
+            cache.set(key, key)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get(0))
+        self.assertEqual(cache.get(2), 2)
+
+    def test_cache_pop(self):
+        cache = TTLCache(ttl=30)
+        cache.set('key', 'value')
+        self.assertEqual(cache.pop('key'), 'value')
+        self.assertIsNone(cache.get('key'))
+
+
+class TestCachedDecorator(unittest.TestCase):
+
+    def test_cached_calls_once(self):
+        calls = []
+
+        @cached(ttl=30)
+        def query(tenant_id, namespaces):
+            calls.append(tenant_id)
+            return [tenant_id]
+
+        self.assertEqual(query(tenant_id='a', namespaces=['x']), ['a'])
+        self.assertEqual(query(namespaces=['x'], tenant_id='a'), ['a'])
+        self.assertEqual(query(tenant_id='b', namespaces=['x']), ['b'])
+        self.assertEqual(calls, ['a', 'b'])
+
+    def test_clear_caches(self):
+        calls = []
+
+        @cached(ttl=30)
+        def query(tenant_id):
+            calls.append(tenant_id)
+            return tenant_id
+
+        query(tenant_id='a')
+        clear_caches()
+        query(tenant_id='a')
+        self.assertEqual(calls, ['a', 'a'])
+
+    def test_clear_caches_revision(self):
+        revision = data_revision()
+        self.assertEqual(data_revision(), revision)
+        clear_caches()
+        self.assertNotEqual(data_revision(), revision)
+
+    def test_since_cleared(self):
+        clear_caches()
+        self.assertLess(since_cleared(), 1)
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_single_flight_coalesces_calls(self):
+        calls = []
+        started = threading.Event()
+        release = threading.Event()
+
+        @single_flight
+        def query(tenant_id):
+            calls.append(tenant_id)
+            started.set()
+            release.wait(1)
+            return [tenant_id]
+
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(query(tenant_id='a')))
+            for _ in range(4)
+        ]
+        threads[0].start()
+        started.wait(1)
+        for thread in threads[1:]:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(calls, ['a'])
+        self.assertEqual(results, [['a']] * 4)
+
+    def test_single_flight_releases_failed_calls(self):
+        @single_flight
+        def query(tenant_id):
+            raise ValueError(tenant_id)
+
+        with self.assertRaises(ValueError):
+            query(tenant_id='a')
+        with self.assertRaises(ValueError):
+            query(tenant_id='a')
@@ -0,0 +1,71 @@
+import datetime
+import unittest
+from unittest import mock
+
+from flask import Flask, request
+
+from rating_operator.api.check import InvalidRequestParameterError
+from rating_operator.api.check import pagination_params, request_params, skip_empty_range
+
+from werkzeug.exceptions import HTTPException
+
+
+class TestPaginationParams(unittest.TestCase):
+
+    def test_pagination_params_default(self):
+        self.assertEqual(pagination_params({}), {'limit': None, 'offset': 0})
+
+    def test_pagination_params_capped(self):
+        params = pagination_params({'limit': '5000', 'offset': '10'})
+        self.assertEqual(params, {'limit': 1000, 'offset': 10})
+
+    def test_pagination_params_invalid(self):
+        for args in ({'limit': '0'}, {'limit': '-1'}, {'limit': 'ten'}, {'offset': '-1'}):
+            with self.assertRaises(InvalidRequestParameterError):
+                pagination_params(args)
+
+
+class TestRequestParams(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+
+    def test_request_params_invalid_limit(self):
+        with self.app.test_request_context('/?limit=ten'):
+            with self.assertRaises(HTTPException) as ctx:
+                request_params(request.args)
+        self.assertEqual(ctx.exception.response.status_code, 400)
+        self.assertIn('limit', ctx.exception.response.get_json()['message'])
+
+    def test_request_params_valid(self):
+        with self.app.test_request_context('/?limit=10&offset=20&metric=usage_cpu'):
+            params = request_params(request.args)
+        self.assertEqual(params['limit'], 10)
+        self.assertEqual(params['offset'], 20)
+        self.assertEqual(params['metric'], 'usage_cpu')
+
+
+@mock.patch('rating_operator.api.check.frames_span', return_value=(
+    datetime.datetime(2026, 1, 1), datetime.datetime(2026, 1, 31)))
+class TestSkipEmptyRange(unittest.TestCase):
+
+    def setUp(self):
+        self.view = mock.Mock(return_value=['rows'])
+        self.decorated = skip_empty_range(lambda: ([], 0))(self.view)
+
+    def test_skip_empty_range_outside(self, frames_span):
+        for start, end in (('2025-12-01 00:00:00.000Z', '2025-12-31 00:00:00.000Z'),
+                           ('2026-02-01 00:00:00.000Z', '2026-02-28 00:00:00.000Z')):
+            self.assertEqual(self.decorated(start=start, end=end), ([], 0))
+        self.view.assert_not_called()
+
+    def test_skip_empty_range_overlapping(self, frames_span):
+        params = {'start': '2025-12-15 00:00:00.000Z', 'end': '2026-01-15 00:00:00.000Z'}
+        self.assertEqual(self.decorated(**params), ['rows'])
+        self.view.assert_called_once_with(**params)
+
+    def test_skip_empty_range_no_frames(self, frames_span):
+        frames_span.return_value = (None, None)
+        params = {'start': '2026-01-10 00:00:00.000Z', 'end': '2026-01-15 00:00:00.000Z'}
+        self.assertEqual(self.decorated(**params), ([], 0))
+        self.view.assert_not_called()
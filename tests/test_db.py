@@ -0,0 +1,68 @@
+import unittest
+
+from flask import Flask, g
+
+from prometheus_client import REGISTRY
+
+from rating_operator.api.db import db, setup_database
+
+from werkzeug.test import Client
+
+
+class TestQueryCount(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        setup_database(self.app)
+
+        @self.app.route('/queries/<int:count>')
+        def queries(count):
+            for _ in range(count):
+                db.engine.execute('SELECT 1')
+            return str(g.get('sql_queries', 0))
+
+        self.client = Client(self.app, self.app.response_class)
+
+    def sample(self, name):
+        return REGISTRY.get_sample_value(
+            f'rating_api_sql_queries_per_request_{name}',
+            {'route': '/queries/<int:count>'}
+        ) or 0
+
+    def test_query_count_per_request(self):
+        count, total = self.sample('count'), self.sample('sum')
+        response = self.client.get('/queries/3')
+        self.assertEqual(response.get_data(as_text=True), '3')
+        self.assertEqual(self.sample('count'), count + 1)
+        self.assertEqual(self.sample('sum'), total + 3)
+
+    def test_query_count_reset_between_requests(self):
+        self.client.get('/queries/2')
+        total = self.sample('sum')
+        response = self.client.get('/queries/0')
+        self.assertEqual(response.get_data(as_text=True), '0')
+        self.assertEqual(self.sample('sum'), total)
+
+
+class TestPoolUsage(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        # Engines connect lazily, the pool is measured without a database
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql://localhost/rating'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_size': 4}
+        setup_database(self.app)
+
+    def test_pool_usage_gauges(self):
+        with self.app.app_context():
+            self.assertEqual(REGISTRY.get_sample_value('rating_api_db_pool_size'), 4)
+            self.assertEqual(
+                REGISTRY.get_sample_value('rating_api_db_pool_checked_out'), 0)
+            self.assertEqual(
+                REGISTRY.get_sample_value('rating_api_db_pool_overflow'), -4)
+
+    def test_pool_usage_outside_app_context(self):
+        self.assertEqual(REGISTRY.get_sample_value('rating_api_db_pool_size'), 0)
@@ -0,0 +1,61 @@
+import unittest
+
+from rating_operator.api.endpoints.grafana import format_timeserie_response, to_timestamp
+
+
+FIRST = 'Thu, 01 Jan 2026 00:00:00 GMT'
+SECOND = 'Thu, 01 Jan 2026 01:00:00 GMT'
+
+
+class TestFormatTimeserieResponse(unittest.TestCase):
+
+    def test_format_timeserie_several_labels(self):
+        content = [
+            {'frame_begin': FIRST, 'frame_price': 1.0, 'metric': 'usage_cpu',
+             'pod': 'pod-a', 'namespace': 'ns', 'node': 'node-1'},
+            {'frame_begin': FIRST, 'frame_price': 2.0, 'metric': 'usage_cpu',
+             'pod': 'pod-b', 'namespace': 'ns', 'node': 'node-1'},
+            {'frame_begin': SECOND, 'frame_price': 3.0, 'metric': 'usage_cpu',
+             'pod': 'pod-a', 'namespace': 'ns', 'node': 'node-1'},
+        ]
+        self.assertEqual(format_timeserie_response(content), [
+            {
+                'target': "{'node': 'node-1', 'namespace': 'ns', 'pod': 'pod-a', "
+                          "'metric': 'usage_cpu'}",
+                'datapoints': [[1.0, to_timestamp(FIRST)], [3.0, to_timestamp(SECOND)]]
+            },
+            {
+                'target': "{'node': 'node-1', 'namespace': 'ns', 'pod': 'pod-b', "
+                          "'metric': 'usage_cpu'}",
+                'datapoints': [[2.0, to_timestamp(FIRST)]]
+            }
+        ])
+
+    def test_format_timeserie_additionnal_labels(self):
+        content = [
+            {'frame_begin': FIRST, 'frame_price': 1.0, 'namespace': 'ns', 'pod': 'pod-a'},
+            {'frame_begin': FIRST, 'frame_price': 2.0, 'namespace': 'ns', 'pod': 'pod-b'},
+        ]
+        self.assertEqual(format_timeserie_response(content, {'namespace': 'ns'}), [
+            {'target': 'pod-a', 'datapoints': [[1.0, to_timestamp(FIRST)]]},
+            {'target': 'pod-b', 'datapoints': [[2.0, to_timestamp(FIRST)]]}
+        ])
+
+    def test_format_timeserie_single_label(self):
+        content = [
+            {'frame_begin': FIRST, 'frame_price': 1.0, 'namespace': 'ns-b'},
+            {'frame_begin': FIRST, 'frame_price': 2.0, 'namespace': 'ns-a'},
+        ]
+        self.assertEqual(
+            [serie['target'] for serie in format_timeserie_response(content)],
+            ['ns-b', 'ns-a'])
+
+    def test_format_timeserie_without_label(self):
+        content = [{'frame_begin': FIRST}]
+        self.assertEqual(format_timeserie_response(content), [
+            {'target': '{}', 'datapoints': [[1, to_timestamp(FIRST)]]}
+        ])
+
+    def test_format_timeserie_without_frames(self):
+        self.assertEqual(format_timeserie_response([]), [])
+        self.assertEqual(format_timeserie_response([{'namespace': 'ns'}]), [])
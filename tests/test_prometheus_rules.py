@@ -0,0 +1,105 @@
+import unittest
+
+from rating_operator.api.endpoints.prometheus import RuleConflictError
+from rating_operator.api.endpoints.prometheus import add_rule, delete_rule
+from rating_operator.api.endpoints.prometheus import edit_rule, find_group
+
+
+def prometheus_rule():
+    return {
+        'spec': {
+            'groups': [
+                {
+                    'name': 'rating.rules',
+                    'rules': [
+                        {'expr': 'sum(pod_cpu)', 'record': 'usage_cpu'},
+                        {'expr': 'sum(pod_memory)', 'record': 'usage_memory'}
+                    ]
+                },
+                {
+                    'name': 'rating.rules',
+                    'rules': []
+                }
+            ]
+        }
+    }
+
+
+class TestFindGroup(unittest.TestCase):
+
+    def test_find_group_first_match(self):
+        prom_object = prometheus_rule()
+        group = find_group(prom_object, 'rating.rules')
+        self.assertIs(group, prom_object['spec']['groups'][0])
+
+    def test_find_group_missing(self):
+        self.assertIsNone(find_group(prometheus_rule(), 'missing.rules'))
+
+
+class TestAddRule(unittest.TestCase):
+
+    def test_add_rule_existing_group(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'rating.rules', 'expr': 'sum(pod_disk)', 'record': 'usage_disk'}
+        self.assertEqual(add_rule(prom_object, form), ('Metric added', True))
+        groups = prom_object['spec']['groups']
+        self.assertEqual(groups[0]['rules'][-1],
+                         {'expr': 'sum(pod_disk)', 'record': 'usage_disk'})
+        self.assertEqual(groups[1]['rules'], [])
+
+    def test_add_rule_missing_group(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'new.rules', 'expr': 'sum(pod_disk)', 'record': 'usage_disk'}
+        self.assertEqual(add_rule(prom_object, form), ('Metric added', True))
+        self.assertEqual(prom_object['spec']['groups'][-1], {
+            'name': 'new.rules',
+            'rules': [{'expr': 'sum(pod_disk)', 'record': 'usage_disk'}]
+        })
+
+    def test_add_rule_duplicate(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'rating.rules', 'expr': 'sum(pod_cpu)', 'record': 'usage_cpu'}
+        with self.assertRaises(RuleConflictError):
+            add_rule(prom_object, form)
+        self.assertEqual(prom_object, prometheus_rule())
+
+
+class TestEditRule(unittest.TestCase):
+
+    def test_edit_rule(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'rating.rules', 'expr': 'max(pod_cpu)', 'record': 'usage_cpu'}
+        self.assertEqual(edit_rule(prom_object, form), ('Metric edited', True))
+        self.assertEqual(prom_object['spec']['groups'][0]['rules'][0]['expr'],
+                         'max(pod_cpu)')
+
+    def test_edit_rule_same_expression(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'rating.rules', 'expr': 'sum(pod_cpu)', 'record': 'usage_cpu'}
+        self.assertEqual(edit_rule(prom_object, form), ('Metric edited', False))
+
+    def test_edit_rule_missing(self):
+        for group, record in (('rating.rules', 'usage_disk'),
+                              ('missing.rules', 'usage_cpu')):
+            prom_object = prometheus_rule()
+            form = {'group': group, 'expr': 'max(pod_cpu)', 'record': record}
+            self.assertEqual(edit_rule(prom_object, form), ('Metric edited', False))
+            self.assertEqual(prom_object, prometheus_rule())
+
+
+class TestDeleteRule(unittest.TestCase):
+
+    def test_delete_rule(self):
+        prom_object = prometheus_rule()
+        form = {'group': 'rating.rules', 'record': 'usage_cpu'}
+        self.assertEqual(delete_rule(prom_object, form), ('Metric removed', True))
+        self.assertEqual(prom_object['spec']['groups'][0]['rules'],
+                         [{'expr': 'sum(pod_memory)', 'record': 'usage_memory'}])
+
+    def test_delete_rule_missing(self):
+        for group, record in (('rating.rules', 'usage_disk'),
+                              ('missing.rules', 'usage_cpu')):
+            prom_object = prometheus_rule()
+            form = {'group': group, 'record': record}
+            self.assertEqual(delete_rule(prom_object, form), ('Metric removed', False))
+            self.assertEqual(prom_object, prometheus_rule())
@@ -0,0 +1,27 @@
+import unittest
+from unittest import mock
+
+from rating_operator.api import secret
+
+
+class TestKubernetesApis(unittest.TestCase):
+
+    def setUp(self):
+        secret.reset_k8s_client()
+        self.addCleanup(secret.reset_k8s_client)
+
+    @mock.patch('rating_operator.api.secret.client')
+    def test_core_v1_api_built_once(self, k8s_client):
+        first = secret.get_core_v1_api()
+        second = secret.get_core_v1_api()
+        self.assertIs(first, k8s_client.CoreV1Api.return_value)
+        self.assertIs(second, first)
+        k8s_client.CoreV1Api.assert_called_once_with(k8s_client.ApiClient.return_value)
+        k8s_client.ApiClient.assert_called_once()
+
+    @mock.patch('rating_operator.api.secret.client')
+    def test_core_v1_api_rebuilt_after_reset(self, k8s_client):
+        secret.get_core_v1_api()
+        secret.reset_k8s_client()
+        secret.get_core_v1_api()
+        self.assertEqual(k8s_client.CoreV1Api.call_count, 2)
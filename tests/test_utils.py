@@ -0,0 +1,48 @@
+import unittest
+from unittest import mock
+
+from flask import Flask
+
+from rating_operator.api import utils
+from rating_operator.api.cache import clear_caches
+
+from sqlalchemy.exc import OperationalError
+
+
+class TestReadEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SQLALCHEMY_BINDS'] = {'replica': 'postgresql://replica'}
+        self.app.config['POSTGRES_REPLICA_MAX_LAG'] = 10
+        patcher = mock.patch('rating_operator.api.utils.db')
+        self.db = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.replica = self.db.get_engine.return_value
+        utils._replica_lag.clear()
+        self.addCleanup(utils._replica_lag.clear)
+
+    @mock.patch('rating_operator.api.utils.since_cleared', return_value=60)
+    def test_read_engine_replica(self, since_cleared):
+        self.replica.execute.return_value.scalar.return_value = 1
+        with self.app.app_context():
+            self.assertIs(utils.read_engine(), self.replica)
+
+    @mock.patch('rating_operator.api.utils.since_cleared', return_value=60)
+    def test_read_engine_replica_lagging(self, since_cleared):
+        self.replica.execute.return_value.scalar.return_value = 30
+        with self.app.app_context():
+            self.assertIs(utils.read_engine(), self.db.engine)
+
+    @mock.patch('rating_operator.api.utils.since_cleared', return_value=60)
+    def test_read_engine_replica_unreachable(self, since_cleared):
+        self.replica.execute.side_effect = OperationalError('SELECT', {}, Exception())
+        with self.app.app_context():
+            self.assertIs(utils.read_engine(), self.db.engine)
+
+    def test_read_engine_after_write(self):
+        self.replica.execute.return_value.scalar.return_value = 0
+        clear_caches()
+        with self.app.app_context():
+            self.assertIs(utils.read_engine(), self.db.engine)
+        self.replica.execute.assert_not_called()